@@ -0,0 +1,114 @@
+"""
+Micro-benchmark for the line filters: the original per-line re.match calls
+against the precompiled matcher and the per-page candidate_lines batch call.
+
+Usage (from the adobe-hackathon-1a directory):
+    python benchmarks/bench_filters.py [PDF or directory ...]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import fitz  # PyMuPDF
+from src.spans import PageSpans
+from src.filters import candidate_lines, WHITESPACE_RE, HEADING_PREFIX_RE, TRAILING_PERIOD_RE
+from bench_spans import DEFAULT_CORPORA, find_pdfs
+
+def legacy_is_page_number_or_footer(text):
+    if re.match(r'^\d+$', text):
+        return True
+    footer_patterns = [
+        r'^Page \d+( of \d+)?$',
+        r'^\d+/\d+$',
+        r'^Copyright',
+        r'^All rights reserved',
+        r'^Confidential'
+    ]
+    for pattern in footer_patterns:
+        if re.match(pattern, text, re.IGNORECASE):
+            return True
+    return False
+
+def legacy_filter(pages):
+    kept = []
+    for texts in pages:
+        for row, text in enumerate(texts):
+            text = text.strip()
+            if not text or len(text) > 200:
+                continue
+            if text.isdigit() or text.startswith("Page ") or legacy_is_page_number_or_footer(text):
+                continue
+            kept.append((row, text))
+    return kept
+
+def batch_filter(pages):
+    kept = []
+    for texts in pages:
+        kept.extend(candidate_lines(texts))
+    return kept
+
+def legacy_clean(lines):
+    cleaned = []
+    for _, text in lines:
+        text = re.sub(r'\s+', ' ', text).strip()
+        text = re.sub(r'^(Chapter|Section|Part)\s+[\d\.]+[:\.]?\s*', '', text, flags=re.IGNORECASE)
+        cleaned.append(re.sub(r'\.$', '', text))
+    return cleaned
+
+def precompiled_clean(lines):
+    cleaned = []
+    for _, text in lines:
+        text = WHITESPACE_RE.sub(' ', text).strip()
+        text = HEADING_PREFIX_RE.sub('', text)
+        cleaned.append(TRAILING_PERIOD_RE.sub('', text))
+    return cleaned
+
+def best_of(func, data, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the line filters")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_CORPORA, help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant (best time is kept)")
+    args = parser.parse_args()
+
+    pages = []
+    for pdf_path in find_pdfs(args.paths):
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                pages.append(PageSpans.from_page(page).texts)
+
+    line_count = sum(len(texts) for texts in pages)
+    if not line_count:
+        print("No text lines found")
+        return 1
+    print(f"{len(pages)} pages, {line_count} lines")
+
+    legacy_time, legacy_kept = best_of(legacy_filter, pages, args.repeat)
+    batch_time, batch_kept = best_of(batch_filter, pages, args.repeat)
+    if legacy_kept != batch_kept:
+        print("WARNING: filters disagree")
+    print(f"filter   legacy {legacy_time * 1000:8.2f} ms   batch       {batch_time * 1000:8.2f} ms   "
+          f"{legacy_time / max(batch_time, 1e-9):5.1f}x")
+
+    legacy_time, legacy_cleaned = best_of(legacy_clean, batch_kept, args.repeat)
+    compiled_time, compiled_cleaned = best_of(precompiled_clean, batch_kept, args.repeat)
+    if legacy_cleaned != compiled_cleaned:
+        print("WARNING: cleanup disagrees")
+    print(f"cleanup  legacy {legacy_time * 1000:8.2f} ms   precompiled {compiled_time * 1000:8.2f} ms   "
+          f"{legacy_time / max(compiled_time, 1e-9):5.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
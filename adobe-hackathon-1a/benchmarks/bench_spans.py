@@ -0,0 +1,113 @@
+"""
+Benchmark page parsing: the original per-page get_text("dict") walk against
+the PageSpans table used by DocumentExtractor.
+
+Usage (from the adobe-hackathon-1a directory):
+    python benchmarks/bench_spans.py [PDF or directory ...]
+
+Without arguments it runs over input/ and the bundled 1b test case PDFs.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import fitz  # PyMuPDF
+from src.spans import PageSpans
+
+DEFAULT_CORPORA = [
+    os.path.join(BASE_DIR, "input"),
+    os.path.join(BASE_DIR, "..", "adobe-hackathon-1b", "Test cases", "*", "Input"),
+]
+
+def find_pdfs(paths):
+    pdf_files = []
+    for path in paths:
+        for match in sorted(glob.glob(path)):
+            if os.path.isdir(match):
+                pdf_files.extend(sorted(glob.glob(os.path.join(match, "*.pdf"))))
+            elif match.lower().endswith(".pdf"):
+                pdf_files.append(match)
+    return pdf_files
+
+def parse_legacy(doc):
+    """
+    What DocumentExtractor did before PageSpans: page 0 parsed once for the
+    title, then every page parsed again with the default "dict" flags and
+    per-line lists rebuilt for the heading scan.
+    """
+    rows = []
+    if doc.page_count > 0:
+        doc[0].get_text("dict")
+    for page in doc:
+        for block in page.get_text("dict")["blocks"]:
+            if "lines" not in block:
+                continue
+            for line in block["lines"]:
+                if not line["spans"]:
+                    continue
+                max_size = max([span["size"] for span in line["spans"]])
+                is_bold = any(["bold" in span["font"].lower() for span in line["spans"]])
+                text = "".join([span["text"] for span in line["spans"]]).strip()
+                rows.append((text, max_size, is_bold))
+    return rows
+
+def parse_spans(doc):
+    rows = []
+    for page in doc:
+        spans = PageSpans.from_page(page)
+        for text, max_size, is_bold in zip(spans.texts, spans.sizes, spans.bold):
+            rows.append((text.strip(), max_size, bool(is_bold)))
+    return rows
+
+def best_of(func, doc, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(doc)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PageSpans against the legacy dict parse")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_CORPORA, help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per document (best time is kept)")
+    args = parser.parse_args()
+
+    pdf_files = find_pdfs(args.paths)
+    if not pdf_files:
+        print("No PDF files found")
+        return 1
+
+    total_legacy = total_spans = 0.0
+    total_pages = 0
+    print(f"{'document':<40} {'pages':>5} {'legacy s':>9} {'spans s':>9} {'speedup':>8}")
+    for pdf_path in pdf_files:
+        doc = fitz.open(pdf_path)
+        legacy_time, legacy_rows = best_of(parse_legacy, doc, args.repeat)
+        spans_time, span_rows = best_of(parse_spans, doc, args.repeat)
+        if legacy_rows != span_rows:
+            # Without image blocks MuPDF can join text lines that an image
+            # used to split, so a few documents yield slightly fewer rows
+            print(f"note: {os.path.basename(pdf_path)} has {len(legacy_rows)} legacy rows, "
+                  f"{len(span_rows)} span rows")
+
+        total_legacy += legacy_time
+        total_spans += spans_time
+        total_pages += doc.page_count
+        name = os.path.basename(pdf_path)[:40]
+        print(f"{name:<40} {doc.page_count:>5} {legacy_time:>9.3f} {spans_time:>9.3f} "
+              f"{legacy_time / max(spans_time, 1e-9):>7.1f}x")
+        doc.close()
+
+    print(f"{'TOTAL':<40} {total_pages:>5} {total_legacy:>9.3f} {total_spans:>9.3f} "
+          f"{total_legacy / max(total_spans, 1e-9):>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Benchmark suite for the 1a outline extractor over the bundled corpora.
+
+Reports throughput (docs/s, pages/s), per-document latency percentiles,
+peak RSS and the per-stage breakdown, and compares them with a stored
+baseline. Any metric that is worse than the baseline by more than the
+tolerance is reported as a regression and the script exits with status 1.
+
+Usage (from the adobe-hackathon-1a directory):
+    python benchmarks/bench_suite.py                      # run and compare
+    python benchmarks/bench_suite.py --update-baseline    # record a new baseline
+    python benchmarks/bench_suite.py --output results.json --tolerance 0.3
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import fitz  # PyMuPDF
+from src.extractor import DocumentExtractor
+from src.instrumentation import Instrumentation
+from bench_spans import find_pdfs
+
+DEFAULT_CORPUS = os.path.join(BASE_DIR, "..", "adobe-hackathon-1b", "Test cases", "*", "Input")
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "baseline.json")
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(p * (len(values) - 1)))))
+    return values[index]
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count()
+    }
+
+def run_benchmark(pdf_files, repeat, warmup):
+    extractor = DocumentExtractor()
+    instrumentation = Instrumentation()
+
+    pages = {}
+    for pdf_path in pdf_files:
+        with fitz.open(pdf_path) as doc:
+            pages[pdf_path] = doc.page_count
+
+    for _ in range(warmup):
+        for pdf_path in pdf_files:
+            extractor.extract_document_structure(pdf_path)
+
+    latencies = []
+    per_document = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for pdf_path in pdf_files:
+            extractor.instrumentation = instrumentation
+            doc_start = time.perf_counter()
+            with instrumentation.document(os.path.basename(pdf_path)):
+                extractor.extract_document_structure(pdf_path)
+            latency = time.perf_counter() - doc_start
+            latencies.append(latency)
+            per_document.setdefault(os.path.basename(pdf_path), []).append(latency)
+    elapsed = time.perf_counter() - start
+    extractor.instrumentation = None
+
+    total_docs = len(pdf_files) * repeat
+    total_pages = sum(pages.values()) * repeat
+    report = instrumentation.report()
+    return {
+        "pipeline": "1a",
+        "machine": machine_info(),
+        "documents": len(pdf_files),
+        "pages": sum(pages.values()),
+        "repeat": repeat,
+        "elapsed_s": round(elapsed, 4),
+        "throughput": {
+            "docs_per_s": round(total_docs / elapsed, 3),
+            "pages_per_s": round(total_pages / elapsed, 3)
+        },
+        "latency_s": {
+            "p50": round(percentile(latencies, 0.50), 5),
+            "p95": round(percentile(latencies, 0.95), 5),
+            "max": round(max(latencies), 5)
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": report["stages"],
+        "per_document": {
+            name: {"pages": pages[path], "latency_s": round(percentile(per_document[name], 0.5), 5)}
+            for path in pdf_files
+            for name in [os.path.basename(path)]
+        }
+    }
+
+def compare(results, baseline, tolerance):
+    """
+    Return a list of regression messages; higher is worse for latency and
+    memory, lower is worse for throughput.
+    """
+    checks = [
+        ("throughput.docs_per_s", results["throughput"]["docs_per_s"], baseline["throughput"]["docs_per_s"], False),
+        ("throughput.pages_per_s", results["throughput"]["pages_per_s"], baseline["throughput"]["pages_per_s"], False),
+        ("latency_s.p50", results["latency_s"]["p50"], baseline["latency_s"]["p50"], True),
+        ("latency_s.p95", results["latency_s"]["p95"], baseline["latency_s"]["p95"], True),
+        ("peak_rss_mb", results["peak_rss_mb"], baseline["peak_rss_mb"], True),
+    ]
+    regressions = []
+    for name, current, reference, higher_is_worse in checks:
+        if higher_is_worse:
+            regressed = current > reference * (1 + tolerance)
+        else:
+            regressed = current < reference * (1 - tolerance)
+        if regressed:
+            regressions.append(f"{name}: {current} vs baseline {reference} ({(current / reference - 1) * 100:+.0f}%)")
+    return regressions
+
+def print_summary(results):
+    print(f"{results['documents']} documents, {results['pages']} pages, {results['repeat']} run(s)")
+    print(f"throughput   {results['throughput']['docs_per_s']:.2f} docs/s   {results['throughput']['pages_per_s']:.1f} pages/s")
+    print(f"latency      p50 {results['latency_s']['p50'] * 1000:.1f} ms   p95 {results['latency_s']['p95'] * 1000:.1f} ms   "
+          f"max {results['latency_s']['max'] * 1000:.1f} ms")
+    print(f"peak RSS     {results['peak_rss_mb']:.1f} MB")
+    for name, stats in results["stages"].items():
+        print(f"  {name:<18} {stats['wall_s']:8.3f}s wall {stats['cpu_s']:8.3f}s CPU  ({stats['calls']} calls)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the 1a outline extractor")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_CORPUS], help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs over the corpus")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs before measuring")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before failing")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    args = parser.parse_args()
+
+    pdf_files = find_pdfs(args.paths)
+    if not pdf_files:
+        print("No PDF files found")
+        return 1
+
+    results = run_benchmark(pdf_files, args.repeat, args.warmup)
+    print_summary(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != results["machine"]:
+        print("note: baseline was recorded on a different machine, comparisons are indicative only")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"PERFORMANCE REGRESSION (tolerance {args.tolerance:.0%}):")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
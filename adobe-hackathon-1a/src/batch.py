@@ -0,0 +1,210 @@
+import os
+import logging
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from .extractor import DocumentExtractor
+from .instrumentation import Instrumentation
+from .utils import save_json, get_output_path
+
+logger = logging.getLogger(__name__)
+
+# One extractor per worker process, created by the pool initializer
+_worker_extractor = None
+
+def default_worker_count():
+    """
+    Number of worker processes to use when none is configured.
+    """
+    return os.cpu_count() or 1
+
+def _init_worker(options=None):
+    """
+    Pool initializer: build the extractor once for this worker process.
+    """
+    global _worker_extractor
+    _worker_extractor = DocumentExtractor(**(options or {}))
+
+def _get_worker_extractor():
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = DocumentExtractor()
+    return _worker_extractor
+
+def process_one(pdf_path, output_dir, extractor=None, cache=None, compact=False):
+    """
+    Extract the structure of a single PDF and save it as JSON.
+    Returns a result record instead of raising so that one bad file
+    never aborts the batch; a PDF that cannot be read gives a failed
+    record with the extractor's error and no output file. With a cache, a file whose content was seen
+    before is answered without opening the PDF. The record carries the
+    file's per-stage timings so they survive the trip back from a worker.
+    With output_dir None nothing is written and the record carries the
+    extracted structure as "output" instead.
+    """
+    if extractor is None:
+        extractor = _get_worker_extractor()
+
+    output_path = get_output_path(pdf_path, output_dir) if output_dir is not None else None
+    result = {
+        "path": pdf_path,
+        "output_path": output_path,
+        "success": False,
+        "cached": False,
+        "error": None,
+        "timings": {}
+    }
+
+    instrumentation = Instrumentation()
+    extractor.instrumentation = instrumentation
+    try:
+        with instrumentation.document(pdf_path):
+            output = None
+            if cache is not None:
+                with instrumentation.stage("cache_lookup"):
+                    key = cache.make_key(pdf_path, extractor)
+                    output = cache.get(key)
+                result["cached"] = output is not None
+
+            if output is None:
+                output = extractor.extract_document_structure(pdf_path)
+                # The extractor reports an unreadable PDF through last_error; such a file
+                # fails, is neither cached nor written, and is retried next time
+                if extractor.last_error is not None:
+                    result["error"] = extractor.last_error
+                    return result
+                if cache is not None:
+                    with instrumentation.stage("cache_store"):
+                        cache.put(key, output)
+
+            if output_path is None:
+                result["output"] = output
+                result["success"] = True
+            else:
+                with instrumentation.stage("json_write"):
+                    saved = save_json(output, output_path, skip_unchanged=result["cached"], compact=compact)
+                if saved:
+                    result["success"] = True
+                else:
+                    result["error"] = f"Could not write {output_path}"
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        extractor.instrumentation = None
+        result["timings"] = instrumentation.document_stages(pdf_path)
+
+    return result
+
+def _crashed_result(pdf_path, output_dir, error):
+    return {
+        "path": pdf_path,
+        "output_path": get_output_path(pdf_path, output_dir) if output_dir is not None else None,
+        "success": False,
+        "cached": False,
+        "error": error,
+        "timings": {}
+    }
+
+def _process_isolated(pdf_path, output_dir, cache, options, compact=False):
+    """
+    Re-run a file that was in flight when a worker died in its own
+    single-worker pool, so the crash is pinned on the file that caused it.
+    """
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                                    initargs=(options,)) as executor:
+            return executor.submit(process_one, pdf_path, output_dir, None, cache, compact).result()
+    except BrokenProcessPool:
+        logger.error(f"Worker crashed while processing {pdf_path}")
+        return _crashed_result(pdf_path, output_dir, "worker process crashed")
+
+def _process_pool(pdf_files, output_dir, workers, cache, options, compact=False, on_result=None):
+    """
+    Run the batch on a process pool. At most two files per worker are in
+    flight at once, so a crashed worker only implicates those files: they
+    are retried one by one in isolation and the rest of the batch carries
+    on in a fresh pool. on_result is called with each result as it arrives.
+    """
+    results = {}
+    queue = list(reversed(pdf_files))
+    max_in_flight = workers * 2
+
+    while queue:
+        suspects = []
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                          initargs=(options,))
+        try:
+            in_flight = {}
+            while queue or in_flight:
+                while queue and len(in_flight) < max_in_flight:
+                    pdf_path = queue.pop()
+                    future = executor.submit(process_one, pdf_path, output_dir, None, cache, compact)
+                    in_flight[future] = pdf_path
+
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    pdf_path = in_flight.pop(future)
+                    try:
+                        results[pdf_path] = future.result()
+                    except BrokenProcessPool:
+                        suspects.append(pdf_path)
+                        continue
+                    if on_result is not None:
+                        on_result(results[pdf_path])
+
+                if suspects:
+                    suspects.extend(in_flight.values())
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if suspects:
+            logger.warning(f"Worker pool crashed, retrying {len(suspects)} file(s) in isolation")
+            for pdf_path in suspects:
+                results[pdf_path] = _process_isolated(pdf_path, output_dir, cache, options, compact)
+                if on_result is not None:
+                    on_result(results[pdf_path])
+
+    return [results[pdf_path] for pdf_path in pdf_files]
+
+def process_pdfs(pdf_files, output_dir, workers=None, extractor=None, cache=None, options=None,
+                 instrumentation=None, compact=False, on_result=None):
+    """
+    Process a list of PDF files, sequentially or on a pool of worker processes.
+    Returns one result record per input file, in input order. An optional
+    ResultCache is shared by all workers, and options are passed on to the
+    DocumentExtractor each worker builds. Per-file stage timings are merged
+    into instrumentation when given. JSON files are written compact on
+    request; on_result is called with every result record as soon as its
+    file is done, in completion order, so results can be streamed.
+    """
+    if workers is None:
+        workers = default_worker_count()
+    workers = max(1, min(workers, len(pdf_files)))
+
+    if workers == 1:
+        if extractor is None:
+            extractor = DocumentExtractor(**(options or {}))
+        results = []
+        for pdf_path in pdf_files:
+            logger.info(f"Processing PDF: {pdf_path}")
+            results.append(process_one(pdf_path, output_dir, extractor, cache, compact))
+            if on_result is not None:
+                on_result(results[-1])
+    else:
+        logger.info(f"Processing {len(pdf_files)} PDF files with {workers} worker processes")
+        results = _process_pool(pdf_files, output_dir, workers, cache, options, compact, on_result)
+
+    for result in results:
+        if instrumentation is not None:
+            instrumentation.merge(result["path"], result["timings"])
+        if result["success"]:
+            logger.info(f"Successfully processed {result['path']}")
+        else:
+            logger.error(f"Error processing {result['path']}: {result['error']}")
+
+    if cache is not None:
+        cached_count = sum(1 for result in results if result["cached"])
+        logger.info(f"Result cache: {cached_count}/{len(results)} files served from cache, "
+                    f"totals {cache.stats()}")
+
+    return results
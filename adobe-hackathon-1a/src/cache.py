@@ -0,0 +1,159 @@
+import io
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def file_digest(pdf_path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a file's content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_digest(source):
+    """
+    SHA-256 of a PDF given as a path or as in-memory data.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return file_digest(source)
+    if isinstance(source, io.BytesIO):
+        source = source.getbuffer()
+    return hashlib.sha256(source).hexdigest()
+
+class ResultCache:
+    """
+    On-disk cache of extracted document structures, keyed by the PDF's
+    content hash plus the extractor version and configuration.
+
+    Entries live in a SQLite database (WAL mode) so several worker processes
+    can share one cache directory. Every lookup refreshes the entry's access
+    time; when the stored results exceed max_bytes the least recently used
+    entries are evicted. Hit and miss counters are kept in the database too,
+    so they add up across all processes using the cache.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.db_path = os.path.join(cache_dir, 'results.sqlite')
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Connections cannot cross process boundaries; workers reopen lazily
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pid'] = None
+        return state
+
+    def _connect(self):
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'size INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def make_key(self, pdf_path, extractor):
+        """
+        Cache key for a PDF (path or in-memory data) processed by the given extractor.
+        """
+        config = json.dumps(extractor.cache_config(), sort_keys=True)
+        return f"{source_digest(pdf_path)}-{hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, key):
+        """
+        Return the cached result for key, or None on a miss.
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+            else:
+                conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key, result):
+        """
+        Store a result and evict least recently used entries if the cache
+        has grown past its size limit.
+        """
+        value = json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+        size = len(value.encode('utf-8'))
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, value, size, time.time())
+            )
+            self._evict(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (len(evicted),))
+        logger.info(f"Evicted {len(evicted)} cached result(s)")
+
+    def stats(self):
+        """
+        Hit/miss/eviction counters plus the current number and size of entries.
+        """
+        conn = self._connect()
+        stats = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        stats['entries'] = entries
+        stats['size_bytes'] = size
+        return stats
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._pid = None
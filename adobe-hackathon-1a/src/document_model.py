@@ -0,0 +1,86 @@
+class DocumentModel:
+    """
+    Everything extracted from one parse of a PDF: the span table of every
+    page in the page window, the title and outline, and where each outline
+    heading sits in the span tables. The outline JSON and the per-section
+    text used for persona ranking (Round 1B) are both derived from it, so a
+    document that feeds both is only parsed once.
+    """
+
+    __slots__ = ("title", "outline", "pages", "boundaries")
+
+    def __init__(self, title, outline, pages, boundaries):
+        self.title = title
+        self.outline = outline
+        self.pages = pages  # PageSpans per page, in page order
+        self.boundaries = boundaries  # (page index, row) of each outline heading, None if not found
+
+    def to_outline(self):
+        """
+        The outline JSON, as returned by extract_document_structure.
+        """
+        return {
+            "title": self.title,
+            "outline": self.outline
+        }
+
+    def page_text(self, index, start=0, end=None):
+        """
+        Text of rows [start, end) of a page: the lines of a block joined by
+        newlines, blocks separated by a blank line.
+        """
+        spans = self.pages[index]
+        end = len(spans) if end is None else end
+        parts = []
+        for row in range(start, end):
+            if row > start:
+                parts.append("\n\n" if spans.blocks[row] != spans.blocks[row - 1] else "\n")
+            parts.append(spans.texts[row])
+        return "".join(parts)
+
+    def _text_between(self, start, end):
+        """
+        Text from (page index, row) start up to, not including, end.
+        """
+        (first_page, first_row), (last_page, last_row) = start, end
+        parts = []
+        for index in range(first_page, min(last_page, len(self.pages) - 1) + 1):
+            text = self.page_text(
+                index,
+                first_row if index == first_page else 0,
+                last_row if index == last_page else None
+            )
+            if text.strip():
+                parts.append(text)
+        return "\n\n".join(parts)
+
+    def sections(self):
+        """
+        Split the text at the outline headings. Returns one dict per section
+        with its title, level, 1-indexed page and text, in document order;
+        text before the first heading becomes a section named after the
+        document title. Headings that were not found on their page (a table
+        of contents entry worded differently from the page text) and
+        sections without text are left out.
+        """
+        starts = [(0, 0, {"level": "Title", "text": self.title,
+                          "page": self.pages[0].page_num + 1 if self.pages else 1})]
+        for heading, boundary in zip(self.outline, self.boundaries):
+            if boundary is not None:
+                starts.append((boundary[0], boundary[1], heading))
+
+        sections = []
+        end_of_document = (len(self.pages), 0)
+        for i, (index, row, heading) in enumerate(starts):
+            # The heading line itself is not part of the section text
+            start = (index, row + 1) if i else (index, row)
+            end = starts[i + 1][:2] if i + 1 < len(starts) else end_of_document
+            text = self._text_between(start, end)
+            if text.strip():
+                sections.append({
+                    "title": heading["text"].strip(),
+                    "level": heading["level"],
+                    "page": heading["page"],
+                    "text": text
+                })
+        return sections
@@ -1,43 +1,279 @@
+import io
 import os
-import re
+import mmap
+import heapq
 import logging
 import fitz  # PyMuPDF
+from .spans import PageSpans
+from .document_model import DocumentModel
+from .instrumentation import stage
+from .filters import (
+    WHITESPACE_RE, TITLE_PREFIX_RE, HEADING_PREFIX_RE, TRAILING_PERIOD_RE,
+    is_page_number_or_footer, candidate_lines, RunningHeaderDetector
+)
 
 logger = logging.getLogger(__name__)
 
+def open_pdf(source):
+    """
+    Open a PDF given as a path or as in-memory data: bytes, bytearray,
+    memoryview, mmap or BytesIO. In-memory data is handed to PyMuPDF as a
+    buffer view, so the document is read without a copy or a temp file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    if isinstance(source, io.BytesIO):
+        source = source.getbuffer()
+    elif isinstance(source, (bytearray, mmap.mmap)):
+        source = memoryview(source)
+    if isinstance(source, (bytes, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    raise TypeError(f"Unsupported PDF source: {type(source).__name__}")
+
+def describe_source(source):
+    """
+    Short description of a PDF source for log messages.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    if isinstance(source, io.BytesIO):
+        return f"<in-memory PDF, {source.getbuffer().nbytes} bytes>"
+    return f"<in-memory PDF, {memoryview(source).nbytes} bytes>"
+
 class DocumentExtractor:
-    def __init__(self):
+    # Bump whenever a change alters the extracted output, so cached results
+    # from older versions are not reused
+    VERSION = 3
+    
+    def __init__(self, title_only=False, page_range=None, max_headings=None, local_levels=False):
+        self._validate_options(page_range, max_headings)
         self.min_title_font_size = 12  # Minimum font size for title
         self.min_heading_font_size = 10  # Minimum font size for headings
+        self.title_only = title_only  # Skip the outline entirely
+        self.page_range = page_range  # (first, last) 1-indexed pages to scan for headings, last may be None
+        self.max_headings = max_headings  # Keep at most this many headings
+        # Heading levels come from the font sizes of the whole document, so
+        # they match a full run. With local_levels they come from the pages
+        # scanned: only the page window is read, and the scan stops once
+        # max_headings headings are found, at the cost of levels (and body
+        # text promoted to headings) that can differ from a full run.
+        self.local_levels = local_levels
+        self._cached_spans = None  # (doc, page_num, PageSpans) of the last page parsed
+        self._page_cache = None  # page_num -> PageSpans while every page is kept (extract_document_model)
+        self.last_error = None  # Error from the last extract_document_structure call, if any
+        self.instrumentation = None  # Optional Instrumentation recording per-stage timings
+    
+    @staticmethod
+    def _validate_options(page_range, max_headings):
+        """
+        Reject page windows and heading limits that would silently give an
+        empty or truncated outline.
+        """
+        if page_range is not None:
+            first, last = page_range
+            if first < 1 or (last is not None and last < first):
+                raise ValueError(f"Invalid page range: {page_range} (pages are numbered from 1)")
+        if max_headings is not None and max_headings < 1:
+            raise ValueError(f"max_headings must be at least 1, not {max_headings}")
+    
+    def cache_config(self):
+        """
+        Everything that affects the extracted output, used to key cached results.
+        """
+        return {
+            "version": self.VERSION,
+            "min_title_font_size": self.min_title_font_size,
+            "min_heading_font_size": self.min_heading_font_size,
+            "title_only": self.title_only,
+            "page_range": list(self.page_range) if self.page_range else None,
+            "max_headings": self.max_headings,
+            "local_levels": self.local_levels
+        }
     
     def extract_document_structure(self, pdf_path):
         """
         Extract title and headings from a PDF document using PyMuPDF.
+        The document can be a path or in-memory data (see open_pdf).
         """
         # Initialize the result structure
         result = {
             "title": "Unknown Title",
             "outline": []
         }
+        self.last_error = None
         
         try:
             # Open the PDF document
-            doc = fitz.open(pdf_path)
+            with stage(self.instrumentation, "open"):
+                doc = open_pdf(pdf_path)
             
             # Extract title
-            result["title"] = self._extract_title(doc)
+            with stage(self.instrumentation, "title_detection"):
+                result["title"] = self._extract_title(doc)
             
             # Extract headings
-            result["outline"] = self._extract_headings(doc)
+            if not self.title_only:
+                with stage(self.instrumentation, "header_detection"):
+                    result["outline"] = self._extract_headings(doc)
             
             # Close the document
             doc.close()
             
         except Exception as e:
-            logger.error(f"Error processing {pdf_path}: {e}")
+            logger.error(f"Error processing {describe_source(pdf_path)}: {e}")
+            self.last_error = str(e)
+        finally:
+            self._cached_spans = None
         
         return result
     
+    def extract_document_model(self, pdf_path):
+        """
+        Parse a PDF once into a DocumentModel: the span table of every page
+        in the page window, the title and outline, and the position of each
+        heading, from which both the outline JSON and the text of every
+        section are derived. Unlike extract_document_structure, all pages
+        stay in memory and errors are raised to the caller.
+        """
+        with stage(self.instrumentation, "open"):
+            doc = open_pdf(pdf_path)
+        self._page_cache = {}
+        try:
+            with stage(self.instrumentation, "title_detection"):
+                title = self._extract_title(doc)
+            
+            outline = []
+            if not self.title_only:
+                with stage(self.instrumentation, "header_detection"):
+                    outline = self._extract_headings(doc)
+            
+            # Pages the heading scan did not reach (TOC, early exit) are parsed now
+            pages = [self._get_page_spans(doc, page_num) for page_num in self._page_window(doc)]
+            
+            with stage(self.instrumentation, "section_split"):
+                boundaries = self._locate_headings(pages, outline)
+            return DocumentModel(title, outline, pages, boundaries)
+        finally:
+            self._page_cache = None
+            self._cached_spans = None
+            doc.close()
+    
+    def _locate_headings(self, pages, outline):
+        """
+        Find the (page index, row) of each outline heading: the first line of
+        its page, after the previous heading, whose cleaned text matches,
+        comparing letters and digits only. A heading wrapped over a few lines (or
+        a TOC entry with its number on a line of its own) matches on its
+        first line. A heading that cannot be found maps to None.
+        """
+        def key(text):
+            return "".join(ch for ch in text.lower() if ch.isalnum())
+        
+        page_index = {spans.page_num + 1: index for index, spans in enumerate(pages)}
+        boundaries = []
+        last = (0, -1)
+        for heading in outline:
+            # TOC titles are not cleaned, so compare both sides cleaned
+            target = key(self._clean_heading_text(heading["text"]))
+            index = page_index.get(heading["page"])
+            found = None
+            if target and index is not None and index >= last[0]:
+                texts = pages[index].texts
+                start = last[1] + 1 if index == last[0] else 0
+                for row in range(start, len(texts)):
+                    joined = key(self._clean_heading_text(texts[row]))
+                    if not joined or not target.startswith(joined):
+                        continue
+                    end = row + 1
+                    while joined != target and end < min(row + 4, len(texts)) and target.startswith(joined):
+                        joined += key(texts[end])
+                        end += 1
+                    if joined == target:
+                        found = (index, end - 1)
+                        last = found
+                        break
+            boundaries.append(found)
+        return boundaries
+    
+    def iter_outline(self, pdf_path):
+        """
+        Yield the outline entries of a PDF one by one while the pages are
+        being scanned. Without a TOC this makes two streaming passes: the
+        first only finds the three largest heading font sizes, the second
+        emits headings as soon as their page is read. Only one page is held
+        in memory at a time, whatever the length of the document.
+        """
+        if self.title_only:
+            return
+        
+        with stage(self.instrumentation, "open"):
+            doc = open_pdf(pdf_path)
+        try:
+            toc = doc.get_toc(simple=False)
+            if toc:
+                yield from list(self._toc_headings(toc))[:self.max_headings]
+                return
+            
+            # First pass: learn running headers and the three largest sizes.
+            # For each size, remember whether it has a body line or only the
+            # margin lines it was seen on, in case those turn out to repeat.
+            headers = RunningHeaderDetector()
+            top_sizes = []
+            margin_keys = {}  # font size -> set of margin line keys, None once it has a body line
+            for _, size, _, _, key in self._iter_heading_candidates(doc, headers):
+                if size not in margin_keys:
+                    if len(top_sizes) == 3 and size < top_sizes[-1]:
+                        continue
+                    top_sizes.append(size)
+                    top_sizes.sort(reverse=True)
+                    margin_keys[size] = set()
+                    if len(top_sizes) > 3:
+                        del margin_keys[top_sizes.pop()]
+                
+                if key is None:
+                    margin_keys[size] = None
+                elif margin_keys[size] is not None:
+                    margin_keys[size].add(key)
+            
+            top_sizes = [
+                size for size in top_sizes
+                if margin_keys[size] is None or not all(headers.is_repeated(key) for key in margin_keys[size])
+            ]
+            
+            # Second pass: every running header is known now, emit as we go
+            size_to_level = {size: f"H{i+1}" for i, size in enumerate(top_sizes)}
+            emitted = 0
+            for text, size, bold, page, _ in self._iter_heading_candidates(doc, headers, learn=False,
+                                                                           pages=self._page_window(doc)):
+                if size in size_to_level:
+                    yield self._make_heading(text, size_to_level[size], bold, page)
+                    emitted += 1
+                    if self.max_headings and emitted >= self.max_headings:
+                        return
+        finally:
+            doc.close()
+            self._cached_spans = None
+    
+    def _get_page_spans(self, doc, page_num):
+        """
+        Get the span table for a page, parsing it only once.
+        The last table built is kept, so the first page is shared between
+        title and heading extraction; while a document model is built, every
+        table is kept.
+        """
+        if self._page_cache is not None and page_num in self._page_cache:
+            return self._page_cache[page_num]
+        cached = self._cached_spans
+        if cached is not None and cached[0] is doc and cached[1] == page_num:
+            return cached[2]
+        
+        with stage(self.instrumentation, "text_extraction"):
+            spans = PageSpans.from_page(doc[page_num], page_num)
+        self._cached_spans = (doc, page_num, spans)
+        if self._page_cache is not None:
+            self._page_cache[page_num] = spans
+        return spans
+    
     def _extract_title(self, doc):
         """
         Extract the title from a PDF document.
@@ -55,24 +291,14 @@ class DocumentExtractor:
         
         # If no title in metadata, try to extract from first page
         if doc.page_count > 0:
-            first_page = doc[0]
-            text_blocks = first_page.get_text("dict")["blocks"]
+            first_page = self._get_page_spans(doc, 0)
             
             # Sort blocks by font size (descending)
-            text_blocks = sorted(
-                [b for b in text_blocks if "lines" in b],
-                key=lambda b: max([max([span["size"] for span in line["spans"]]) for line in b["lines"]]),
-                reverse=True
-            )
+            text_blocks = sorted(first_page.iter_blocks(), key=lambda b: b[0], reverse=True)
             
             # Get the first block with the largest font size
             if text_blocks:
-                largest_block = text_blocks[0]
-                title_text = ""
-                for line in largest_block["lines"]:
-                    for span in line["spans"]:
-                        title_text += span["text"]
-                    title_text += " "
+                title_text = text_blocks[0][1]
                 
                 if title_text.strip():
                     title = title_text.strip()
@@ -83,12 +309,7 @@ class DocumentExtractor:
                     # If title is too long, it might be a paragraph, not a title
                     if len(title) > 100 and len(text_blocks) > 1:
                         # Try the second largest text block
-                        second_block = text_blocks[1]
-                        second_title = ""
-                        for line in second_block["lines"]:
-                            for span in line["spans"]:
-                                second_title += span["text"]
-                            second_title += " "
+                        second_title = text_blocks[1][1]
                         
                         if second_title.strip() and len(second_title) < len(title):
                             title = self._clean_title(second_title.strip())
@@ -100,10 +321,10 @@ class DocumentExtractor:
         Clean up the title text.
         """
         # Remove extra whitespace
-        title = re.sub(r'\s+', ' ', title).strip()
+        title = WHITESPACE_RE.sub(' ', title).strip()
         
         # Remove common prefixes like "Title:" or "Document:"
-        title = re.sub(r'^(Title|Document|Subject|Name):\s*', '', title, flags=re.IGNORECASE)
+        title = TITLE_PREFIX_RE.sub('', title)
         
         return title
     
@@ -114,131 +335,166 @@ class DocumentExtractor:
         1. Try to use document's table of contents (TOC)
         2. If not available, extract headings based on font properties
         """
-        headings = []
-        
         # Try to get headings from TOC
         toc = doc.get_toc(simple=False)
         
         # If TOC exists, use it directly
         if toc:
-            for level, title, page, dest in toc:
-                if 1 <= level <= 3:  # Only consider H1, H2, H3
-                    heading_level = f"H{level}"
-                    headings.append({
-                        "level": heading_level,
-                        "text": title,
-                        "page": page
-                    })
-        else:
-            # If no TOC, extract headings based on font properties
-            font_sizes = {}
-            heading_candidates = []
+            return list(self._toc_headings(toc))[:self.max_headings]
+        
+        # If no TOC, extract headings based on font properties.
+        # Only the candidates of the three largest font sizes seen so far are
+        # kept: once a size drops out of the top three it can never come
+        # back, so its candidates can be discarded right away and memory
+        # stays bounded by the size of the outline rather than the document.
+        headers = RunningHeaderDetector()
+        top_sizes = []  # Largest font sizes seen so far, descending, at most 3
+        candidates = {}  # font size -> [(sequence, text, size, bold, page, key), ...]
+        
+        last_page = None
+        for seq, (text, size, bold, page, key) in enumerate(self._iter_heading_candidates(doc, headers)):
+            # Early exit (local levels only): once a page is finished with
+            # enough headings at the current top sizes, not counting running
+            # headers, the remaining pages are not scanned at all
+            if page != last_page:
+                if self.local_levels and self.max_headings and self._has_enough(candidates, headers, self.max_headings):
+                    break
+                last_page = page
             
-            # Collect all text blocks with their font sizes
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                blocks = page.get_text("dict")["blocks"]
-                
-                for block in blocks:
-                    if "lines" not in block:
-                        continue
-                    
-                    for line in block["lines"]:
-                        if not line["spans"]:
-                            continue
-                        
-                        # Get the maximum font size in this line
-                        max_size = max([span["size"] for span in line["spans"]])
-                        
-                        # Check if any span is bold
-                        is_bold = any(["bold" in span["font"].lower() for span in line["spans"]])
-                        
-                        # Combine all text in this line
-                        text = "".join([span["text"] for span in line["spans"]]).strip()
-                        
-                        # Skip empty lines or very long text (likely paragraphs)
-                        if not text or len(text) > 200:
-                            continue
-                        
-                        # Skip page numbers and common footers
-                        if text.isdigit() or text.startswith("Page ") or self._is_page_number_or_footer(text):
-                            continue
-                        
-                        # Add font size to the collection
-                        font_sizes[max_size] = font_sizes.get(max_size, 0) + 1
-                        
-                        # Add to heading candidates
-                        heading_candidates.append({
-                            "text": text,
-                            "size": max_size,
-                            "bold": is_bold,
-                            "page": page_num + 1  # 1-indexed page numbers
-                        })
+            if size not in candidates:
+                if len(top_sizes) == 3 and size < top_sizes[-1]:
+                    continue
+                top_sizes.append(size)
+                top_sizes.sort(reverse=True)
+                candidates[size] = []
+                if len(top_sizes) > 3:
+                    del candidates[top_sizes.pop()]
             
-            # Determine heading levels based on font sizes
-            if heading_candidates:
-                # Sort font sizes in descending order
-                sorted_sizes = sorted(font_sizes.keys(), reverse=True)
-                
-                # Map top 3 sizes to heading levels
-                size_to_level = {}
-                for i, size in enumerate(sorted_sizes[:3]):
-                    size_to_level[size] = f"H{i+1}"
+            candidates[size].append((seq, text, size, bold, page, key))
+        
+        # Running headers are only recognised once they repeat, so drop
+        # their first occurrences now, along with sizes left without lines
+        for size in list(top_sizes):
+            kept = [c for c in candidates[size] if not headers.is_repeated(c[5])]
+            if kept:
+                candidates[size] = kept
+            else:
+                del candidates[size]
+                top_sizes.remove(size)
+        
+        # Map top 3 sizes to heading levels
+        size_to_level = {size: f"H{i+1}" for i, size in enumerate(top_sizes)}
+        
+        # Assign heading levels, restoring document order across sizes; with
+        # document-wide levels, headings outside the page window are dropped
+        window = self._page_window(doc)
+        headings = []
+        for _, text, size, bold, page, _ in heapq.merge(*candidates.values()):
+            if page - 1 in window:
+                headings.append(self._make_heading(text, size_to_level[size], bold, page))
+        
+        return headings[:self.max_headings]
+    
+    @staticmethod
+    def _has_enough(candidates, headers, count):
+        """
+        Whether at least count candidates are not (so far) known running
+        headers; they are only checked once the candidates alone would do.
+        """
+        if sum(len(c) for c in candidates.values()) < count:
+            return False
+        return sum(1 for c in candidates.values() for entry in c if not headers.is_repeated(entry[5])) >= count
+    
+    def _level_window(self, doc):
+        """
+        0-indexed range of pages whose font sizes decide the heading levels:
+        the page window with local levels, otherwise the whole document.
+        """
+        return self._page_window(doc) if self.local_levels else range(doc.page_count)
+    
+    def _page_window(self, doc):
+        """
+        0-indexed range of pages to scan, honouring the configured page range.
+        """
+        if not self.page_range:
+            return range(doc.page_count)
+        first, last = self.page_range
+        last = doc.page_count if last is None else min(last, doc.page_count)
+        return range(max(first, 1) - 1, last)
+    
+    def _toc_headings(self, toc):
+        """
+        Yield outline entries from a document's table of contents,
+        restricted to the configured page range.
+        """
+        first, last = self.page_range or (1, None)
+        for level, title, page, dest in toc:
+            if page < first or (last is not None and page > last):
+                continue
+            if 1 <= level <= 3:  # Only consider H1, H2, H3
+                yield {
+                    "level": f"H{level}",
+                    "text": title,
+                    "page": page
+                }
+    
+    def _iter_heading_candidates(self, doc, headers, learn=True, pages=None):
+        """
+        Stream (text, size, bold, page, margin key) for every line that could
+        be a heading, one page at a time, over pages (by default the pages
+        that decide the heading levels). Page numbers, footers and lines
+        already known to be running headers are skipped. With learn=False
+        the running header detector is only consulted, not updated.
+        """
+        if pages is None:
+            pages = self._level_window(doc)
+        for page_num in pages:
+            spans = self._get_page_spans(doc, page_num)
+            
+            # Skip empty lines, very long text (likely paragraphs), page
+            # numbers and common footers for the whole page at once
+            for row, text in candidate_lines(spans.texts):
+                start = row * 4
+                key = headers.key(text, spans.bboxes[start + 1], spans.bboxes[start + 3], spans.height)
+                if key is not None:
+                    repeated = headers.observe(key, page_num) if learn else headers.is_repeated(key)
+                    if repeated:
+                        continue
                 
-                # Assign heading levels
-                for candidate in heading_candidates:
-                    if candidate["size"] in size_to_level:
-                        level = size_to_level[candidate["size"]]
-                        # Promote level if bold
-                        if candidate["bold"] and level != "H1":
-                            level_num = int(level[1])
-                            level = f"H{max(1, level_num - 1)}"
-                        
-                        # Clean heading text
-                        text = self._clean_heading_text(candidate["text"])
-                        
-                        headings.append({
-                            "level": level,
-                            "text": text,
-                            "page": candidate["page"]
-                        })
+                # 1-indexed page numbers
+                yield text, spans.sizes[row], bool(spans.bold[row]), page_num + 1, key
+    
+    def _make_heading(self, text, level, bold, page):
+        """
+        Build an outline entry, promoting bold headings by one level.
+        """
+        if bold and level != "H1":
+            level_num = int(level[1])
+            level = f"H{max(1, level_num - 1)}"
         
-        return headings
+        return {
+            "level": level,
+            "text": self._clean_heading_text(text),
+            "page": page
+        }
     
     def _is_page_number_or_footer(self, text):
         """
         Check if the text is likely a page number or footer.
         """
-        # Check if it's just a number
-        if re.match(r'^\d+$', text):
-            return True
-        
-        # Check for common footer patterns
-        footer_patterns = [
-            r'^Page \d+( of \d+)?$',
-            r'^\d+/\d+$',
-            r'^Copyright',
-            r'^All rights reserved',
-            r'^Confidential'
-        ]
-        
-        for pattern in footer_patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return True
-        
-        return False
+        return is_page_number_or_footer(text)
     
     def _clean_heading_text(self, text):
         """
         Clean up heading text.
         """
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_RE.sub(' ', text).strip()
         
         # Remove common heading prefixes like "Chapter 1:" or "Section 1.2:"
-        text = re.sub(r'^(Chapter|Section|Part)\s+[\d\.]+[:\.]?\s*', '', text, flags=re.IGNORECASE)
+        text = HEADING_PREFIX_RE.sub('', text)
         
         # Remove trailing periods if they exist
-        text = re.sub(r'\.$', '', text)
+        text = TRAILING_PERIOD_RE.sub('', text)
         
-        return text
\ No newline at end of file
+        return text
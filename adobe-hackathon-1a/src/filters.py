@@ -0,0 +1,86 @@
+import re
+
+# Precompiled patterns shared by the title and heading cleanup
+WHITESPACE_RE = re.compile(r'\s+')
+TITLE_PREFIX_RE = re.compile(r'^(Title|Document|Subject|Name):\s*', re.IGNORECASE)
+HEADING_PREFIX_RE = re.compile(r'^(Chapter|Section|Part)\s+[\d\.]+[:\.]?\s*', re.IGNORECASE)
+TRAILING_PERIOD_RE = re.compile(r'\.$')
+DIGITS_RE = re.compile(r'\d+')
+
+# Page numbers and common footers in a single pattern: a "Page " prefix,
+# bare numbers, "Page N of M", "N/M" and the usual legal boilerplate
+PAGE_NUMBER_OR_FOOTER_RE = re.compile(
+    r'^(?:(?-i:Page )'
+    r'|\d+$'
+    r'|Page \d+( of \d+)?$'
+    r'|\d+/\d+$'
+    r'|Copyright'
+    r'|All rights reserved'
+    r'|Confidential)',
+    re.IGNORECASE
+)
+
+def is_page_number_or_footer(text):
+    """
+    Check if a stripped line is likely a page number or footer.
+    """
+    return text.isdigit() or PAGE_NUMBER_OR_FOOTER_RE.match(text) is not None
+
+def candidate_lines(texts, max_length=200):
+    """
+    Classify all lines of a page in one call.
+    Returns (row, stripped text) for every line that is neither empty,
+    longer than max_length (likely a paragraph) nor a page number or footer.
+    """
+    match = PAGE_NUMBER_OR_FOOTER_RE.match
+    candidates = []
+    for row, text in enumerate(texts):
+        text = text.strip()
+        if not text or len(text) > max_length or text.isdigit() or match(text):
+            continue
+        candidates.append((row, text))
+    return candidates
+
+class RunningHeaderDetector:
+    """
+    Detect running headers and footers: lines in the top or bottom margin
+    of the page that repeat at the same height on several pages.
+
+    Lines are keyed by their rounded vertical position and their lowercased
+    text with digits folded, so "Chapter 2 - Page 14" and "Chapter 2 - Page 15"
+    share a key. Only one small counter per distinct margin line is kept.
+    """
+
+    def __init__(self, min_pages=3, margin=0.1, position_tolerance=4.0):
+        self.min_pages = min_pages  # Pages a line must repeat on to count as running
+        self.margin = margin  # Fraction of the page height treated as header/footer band
+        self.position_tolerance = position_tolerance  # Points, for bucketing y positions
+        self._seen = {}  # key -> [distinct pages seen, last page seen]
+
+    def key(self, text, y0, y1, page_height):
+        """
+        Key for a line, or None when it lies outside the header/footer bands.
+        """
+        band = page_height * self.margin
+        if y0 >= band and y1 <= page_height - band:
+            return None
+        return (round(y0 / self.position_tolerance), DIGITS_RE.sub('#', text.lower()))
+
+    def observe(self, key, page_num):
+        """
+        Record that a margin line was seen on a page.
+        Returns True once the line has repeated on min_pages pages.
+        """
+        seen = self._seen.get(key)
+        if seen is None:
+            self._seen[key] = seen = [0, -1]
+        if seen[1] != page_num:
+            seen[0] += 1
+            seen[1] = page_num
+        return seen[0] >= self.min_pages
+
+    def is_repeated(self, key):
+        if key is None:
+            return False
+        seen = self._seen.get(key)
+        return seen is not None and seen[0] >= self.min_pages
@@ -1,9 +1,14 @@
 import os
 import sys
 import json
+import time
 import logging
-from src.utils import ensure_dir, save_json, get_pdf_files, get_output_path
+from src.utils import ensure_dir, save_json, get_pdf_files, get_output_path, parse_page_range, JsonLinesWriter
 from src.extractor import DocumentExtractor
+from src.batch import process_pdfs, default_worker_count
+from src.cache import ResultCache, DEFAULT_MAX_BYTES
+from src.instrumentation import Instrumentation
+from src.manifest import Manifest, MANIFEST_NAME
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,11 +17,14 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
         
-def extract_document_structure(pdf_path):
+def extract_document_structure(pdf_path, **options):
     """
     Extract title and headings from a PDF document using the DocumentExtractor.
+    The PDF can be a path or in-memory bytes, memoryview, mmap or BytesIO.
+    Options (title_only, page_range, max_headings) trim the result; with
+    local_levels, latency-sensitive callers also stop scanning early.
     """
-    extractor = DocumentExtractor()
+    extractor = DocumentExtractor(**options)
     return extractor.extract_document_structure(pdf_path)
 
 def process_pdf(pdf_path, output_dir):
@@ -40,22 +48,58 @@ def process_pdf(pdf_path, output_dir):
         logger.error(f"Error processing {pdf_path}: {e}")
         return False
 
-def process_directory(input_dir, output_dir):
+def process_directory(input_dir, output_dir, workers=None, cache=None, options=None, instrumentation=None,
+                      compact=False, jsonl_path=None, manifest=None, min_age=0.0):
     """
     Process all PDF files in the input directory.
+    With more than one worker the files are processed on a process pool.
+    With jsonl_path, the outlines are streamed to that JSON Lines file, one
+    record per PDF as soon as it is done, instead of one JSON file each.
+    With a Manifest, only new or changed PDFs are processed (see
+    Manifest.changed_files for min_age), and JSON Lines output goes to a
+    timestamped file per pass holding just those PDFs.
     """
     # Get all PDF files
     pdf_files = get_pdf_files(input_dir)
     
-    if not pdf_files:
+    if not pdf_files and manifest is None:
         logger.warning(f"No PDF files found in {input_dir}")
         return 0
     
-    # Process each PDF
-    success_count = 0
-    for pdf_path in pdf_files:
-        if process_pdf(pdf_path, output_dir):
-            success_count += 1
+    if manifest is not None:
+        output_paths = None if jsonl_path else {pdf_path: get_output_path(pdf_path, output_dir) for pdf_path in pdf_files}
+        total = len(pdf_files)
+        pdf_files = manifest.changed_files(pdf_files, output_paths, min_age)
+        if not pdf_files:
+            manifest.save()
+            return 0
+        logger.info(f"Manifest: {len(pdf_files)} of {total} PDF files are new or changed")
+        if jsonl_path:
+            root, ext = os.path.splitext(jsonl_path)
+            jsonl_path = f"{root}-{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1000) % 1000:03d}{ext}"
+    
+    # Process the PDFs, one result per file in input order
+    if jsonl_path:
+        with JsonLinesWriter(jsonl_path) as writer:
+            def write_record(result):
+                if result["success"]:
+                    writer.write({"file": os.path.basename(result["path"]), **result["output"]})
+            
+            results = process_pdfs(pdf_files, None, workers=workers, cache=cache, options=options,
+                                   instrumentation=instrumentation, on_result=write_record)
+        logger.info(f"Saved {writer.count} JSON Lines records to {jsonl_path}")
+    else:
+        results = process_pdfs(pdf_files, output_dir, workers=workers, cache=cache, options=options,
+                               instrumentation=instrumentation, compact=compact)
+    success_count = sum(1 for result in results if result["success"])
+    
+    # Only files that were extracted and written are recorded; failed or
+    # unreadable ones stay pending, so the next pass retries them
+    if manifest is not None:
+        for result in results:
+            if result["success"] and result["error"] is None:
+                manifest.record(result["path"])
+        manifest.save()
     
     logger.info(f"Processed {success_count}/{len(pdf_files)} PDF files successfully")
     return success_count
@@ -64,19 +108,107 @@ def main():
     # Define input and output directories
     input_dir = os.environ.get('INPUT_DIR', '/app/input')
     output_dir = os.environ.get('OUTPUT_DIR', '/app/output')
+    workers = int(os.environ.get('WORKERS', default_worker_count()))
+    
+    # Output: one JSON file per PDF (indented unless COMPACT_JSON is set), or
+    # OUTPUT_FORMAT=jsonl for a single outlines.jsonl streamed as PDFs finish
+    compact = os.environ.get('COMPACT_JSON', '').lower() in ('1', 'true', 'yes')
+    output_format = os.environ.get('OUTPUT_FORMAT', 'json').lower()
+    if output_format not in ('json', 'jsonl'):
+        logger.error(f"Unknown OUTPUT_FORMAT: {output_format} (use json or jsonl)")
+        return 1
+    jsonl_path = os.path.join(output_dir, 'outlines.jsonl') if output_format == 'jsonl' else None
+    
+    # Incremental mode: a manifest of processed inputs lets unchanged PDFs be
+    # skipped; WATCH=1 keeps polling the input directory for new drops
+    watch = os.environ.get('WATCH', '').lower() in ('1', 'true', 'yes')
+    incremental = watch or os.environ.get('INCREMENTAL', '').lower() in ('1', 'true', 'yes')
+    watch_interval = float(os.environ.get('WATCH_INTERVAL', 5))
+    
+    # Optional early-exit settings for the extractor, checked here rather than in every worker
+    options = {}
+    if os.environ.get('TITLE_ONLY', '').lower() in ('1', 'true', 'yes'):
+        options['title_only'] = True
+    if os.environ.get('LOCAL_LEVELS', '').lower() in ('1', 'true', 'yes'):
+        options['local_levels'] = True
+    try:
+        if os.environ.get('PAGES'):
+            options['page_range'] = parse_page_range(os.environ['PAGES'])
+        if os.environ.get('MAX_HEADINGS'):
+            options['max_headings'] = int(os.environ['MAX_HEADINGS'])
+        DocumentExtractor(**options)
+    except ValueError as e:
+        logger.error(f"Invalid extractor options: {e}")
+        return 1
+    
+    # Optional result cache, shared by all workers
+    cache_dir = os.environ.get('CACHE_DIR')
+    cache = None
+    if cache_dir:
+        max_mb = float(os.environ.get('CACHE_MAX_MB', DEFAULT_MAX_BYTES / (1024 * 1024)))
+        cache = ResultCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024))
     
     # Ensure output directory exists
     ensure_dir(output_dir)
     
+    manifest = None
+    if incremental:
+        manifest_path = os.environ.get('MANIFEST_PATH', os.path.join(output_dir, MANIFEST_NAME))
+        config = {
+            "extractor": DocumentExtractor(**options).cache_config(),
+            "output_format": output_format,
+            "compact": compact
+        }
+        manifest = Manifest.load(manifest_path, config)
+    
+    # Optional per-stage timing report, with cProfile / tracemalloc behind flags
+    report_path = os.environ.get('REPORT_PATH')
+    instrumentation = None
+    if report_path:
+        instrumentation = Instrumentation(
+            profile=os.environ.get('PROFILE', '').lower() in ('1', 'true', 'yes'),
+            trace_memory=os.environ.get('TRACE_MEMORY', '').lower() in ('1', 'true', 'yes')
+        )
+    
     logger.info(f"Starting PDF processing")
     logger.info(f"Input directory: {input_dir}")
     logger.info(f"Output directory: {output_dir}")
+    logger.info(f"Workers: {workers}")
+    if jsonl_path:
+        logger.info(f"Streaming outlines to {jsonl_path}")
+    if cache:
+        logger.info(f"Result cache: {cache_dir}")
+    if options:
+        logger.info(f"Extractor options: {options}")
+    if manifest is not None:
+        logger.info(f"Manifest: {manifest.path} ({len(manifest)} files recorded)")
     
     # Process all PDFs
-    count = process_directory(input_dir, output_dir)
+    count = process_directory(input_dir, output_dir, workers=workers, cache=cache, options=options,
+                              instrumentation=instrumentation, compact=compact, jsonl_path=jsonl_path,
+                              manifest=manifest)
+    
+    if watch:
+        logger.info(f"Watching {input_dir} every {watch_interval:g}s, press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(watch_interval)
+                # Files modified within the last interval may still be being copied in
+                count += process_directory(input_dir, output_dir, workers=workers, cache=cache, options=options,
+                                           instrumentation=instrumentation, compact=compact,
+                                           jsonl_path=jsonl_path, manifest=manifest, min_age=watch_interval)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+    
+    if instrumentation is not None:
+        report = instrumentation.write_report(report_path)
+        instrumentation.close()
+        for name, stats in report["stages"].items():
+            logger.info(f"Stage {name}: {stats['wall_s']:.3f}s wall, {stats['cpu_s']:.3f}s CPU over {stats['calls']} calls")
+        logger.info(f"Timing report written to {report_path}")
     
     logger.info(f"Completed processing {count} PDF files")
-    return 0 if count > 0 else 1
+    return 0 if count > 0 or incremental else 1
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
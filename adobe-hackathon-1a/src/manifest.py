@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import logging
+from .cache import file_digest
+from .utils import dumps_json, write_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.manifest.json'
+
+class Manifest:
+    """
+    Record of the PDFs a batch has already processed: the path, size,
+    modification time and content hash of each input, together with the
+    configuration that produced the outputs.
+
+    A file whose size and modification time are unchanged is skipped
+    without being read. A file that was only touched (new modification
+    time, same size and content hash) is skipped too, after one read.
+    Everything is processed again when the configuration changes. The
+    manifest is saved as JSON with an atomic rename, so an interrupted
+    run leaves the previous manifest intact.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.entries = {}  # PDF path -> {"size", "mtime_ns", "sha256"}
+        self._pending = {}  # PDF path -> entry of a new or changed file, recorded once it is processed
+
+    @classmethod
+    def load(cls, path, config):
+        """
+        Load the manifest at path. A missing or unreadable manifest, or one
+        written for another configuration, starts out empty.
+        """
+        manifest = cls(path, config)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            return manifest
+        if data.get("version") != cls.VERSION or data.get("config") != config:
+            logger.info(f"Configuration changed since {path} was written, processing every file again")
+            return manifest
+        manifest.entries = data.get("files", {})
+        return manifest
+
+    def save(self):
+        data = {"version": self.VERSION, "config": self.config, "files": self.entries}
+        write_atomic(self.path, dumps_json(data))
+
+    def changed_files(self, pdf_files, output_paths=None, min_age=0.0):
+        """
+        Return the PDFs that are new or changed since they were last
+        recorded. With output_paths (PDF path -> output path), a file whose
+        output has gone missing counts as changed too. Files modified less
+        than min_age seconds ago are left for a later scan, since they may
+        still be being written. Files no longer present are forgotten.
+        """
+        now = time.time()
+        changed = []
+        present = set()
+        for pdf_path in pdf_files:
+            present.add(pdf_path)
+            try:
+                stat = os.stat(pdf_path)
+            except OSError:
+                continue
+            if min_age and now - stat.st_mtime < min_age:
+                continue
+
+            entry = self.entries.get(pdf_path)
+            output_missing = output_paths is not None and not os.path.exists(output_paths[pdf_path])
+            if entry is not None and not output_missing:
+                if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+
+            # Only files that may have changed are read, to compare their content hash
+            digest = file_digest(pdf_path)
+            current = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            if entry is not None and not output_missing and entry["sha256"] == digest:
+                self.entries[pdf_path] = current
+                continue
+            self._pending[pdf_path] = current
+            changed.append(pdf_path)
+
+        for pdf_path in list(self.entries):
+            if pdf_path not in present:
+                del self.entries[pdf_path]
+        return changed
+
+    def record(self, pdf_path):
+        """
+        Mark a file returned by changed_files as processed.
+        """
+        entry = self._pending.pop(pdf_path, None)
+        if entry is not None:
+            self.entries[pdf_path] = entry
+
+    def __len__(self):
+        return len(self.entries)
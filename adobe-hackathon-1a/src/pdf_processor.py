@@ -1,13 +1,16 @@
-import os
 import logging
 from .extractor import DocumentExtractor
-from .utils import save_json, get_output_path
+from .utils import save_json, get_output_path, get_pdf_files
+from .batch import process_pdfs
 
 logger = logging.getLogger(__name__)
 
 class PDFProcessor:
-    def __init__(self):
-        self.document_extractor = DocumentExtractor()
+    def __init__(self, **options):
+        self.document_extractor = DocumentExtractor(**options)
+        self.options = options
+        # Result records of the last process_directory call, one per file in input order
+        self.results = []
     
     def process_pdf(self, pdf_path, output_dir):
         """
@@ -18,6 +21,8 @@ class PDFProcessor:
             
             # Extract document structure (title and headings)
             output = self.document_extractor.extract_document_structure(pdf_path)
+            if self.document_extractor.last_error is not None:
+                raise ValueError(self.document_extractor.last_error)
             
             # Save to JSON
             output_path = get_output_path(pdf_path, output_dir)
@@ -30,25 +35,25 @@ class PDFProcessor:
             logger.error(f"Error processing {pdf_path}: {e}")
             return False
     
-    def process_directory(self, input_dir, output_dir):
+    def process_directory(self, input_dir, output_dir, workers=1, cache=None):
         """
         Process all PDF files in the input directory.
+        With more than one worker the files are processed on a process pool.
+        Returns the number of files processed successfully; the per-file
+        result records are kept in self.results.
         """
         # Get all PDF files
-        pdf_files = []
-        for file in os.listdir(input_dir):
-            if file.lower().endswith('.pdf'):
-                pdf_files.append(os.path.join(input_dir, file))
+        pdf_files = get_pdf_files(input_dir)
         
         if not pdf_files:
             logger.warning(f"No PDF files found in {input_dir}")
+            self.results = []
             return 0
         
-        # Process each PDF
-        success_count = 0
-        for pdf_path in pdf_files:
-            if self.process_pdf(pdf_path, output_dir):
-                success_count += 1
+        self.results = process_pdfs(pdf_files, output_dir, workers=workers,
+                                    extractor=self.document_extractor, cache=cache,
+                                    options=self.options)
         
+        success_count = sum(1 for result in self.results if result["success"])
         logger.info(f"Processed {success_count}/{len(pdf_files)} PDF files successfully")
-        return success_count
\ No newline at end of file
+        return success_count
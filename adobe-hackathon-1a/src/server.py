@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import collections
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from src.extractor import DocumentExtractor
+from src.batch import default_worker_count
+from src.utils import parse_page_range
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+# Extractors of this worker process, one per distinct set of options, least recently used first;
+# requests with many different options (pages, max_headings) must not grow it without bound
+_extractors = collections.OrderedDict()
+MAX_EXTRACTORS = 8
+
+DEFAULT_MAX_BODY_MB = 64
+
+def _init_worker():
+    """
+    Pool initializer: warm the worker up with a default extractor.
+    """
+    _get_extractor({})
+
+def _get_extractor(options):
+    key = tuple(sorted(options.items()))
+    extractor = _extractors.get(key)
+    if extractor is None:
+        extractor = _extractors[key] = DocumentExtractor(**options)
+        if len(_extractors) > MAX_EXTRACTORS:
+            _extractors.popitem(last=False)
+    else:
+        _extractors.move_to_end(key)
+    return extractor
+
+def _extract(source, options):
+    """
+    Worker task: extract the outline of a PDF given as a path or as bytes.
+    """
+    extractor = _get_extractor(options)
+    output = extractor.extract_document_structure(source)
+    if extractor.last_error is not None:
+        raise ValueError(extractor.last_error)
+    return output
+
+class QueueFullError(Exception):
+    pass
+
+class ExtractionService:
+    """
+    Pool of warm worker processes serving extraction requests.
+
+    Keeps counters and recent latencies for the metrics endpoint. If a
+    worker crashes, every request in flight on the pool fails with it: the
+    pool is replaced and each of those requests is retried once in its own
+    single-worker pool, so only the request that caused the crash fails.
+    """
+
+    def __init__(self, workers=None, max_queue=None, latency_window=1000):
+        self.workers = workers or default_worker_count()
+        self.max_queue = max_queue or self.workers * 64
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+        self._queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._started = time.time()
+
+    def _new_executor(self):
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def extract(self, source, options=None):
+        """
+        Extract a PDF given as a path or bytes, blocking until it is done.
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(f"Queue is full ({self._queued} requests pending)")
+            self._queued += 1
+            executor = self._executor
+
+        start = time.perf_counter()
+        success = False
+        try:
+            try:
+                output = executor.submit(_extract, source, options or {}).result()
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                output = self._extract_isolated(source, options or {})
+            success = True
+            return output
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self._queued -= 1
+                if success:
+                    self._completed += 1
+                    self._latencies.append(latency)
+                else:
+                    self._failed += 1
+
+    def _extract_isolated(self, source, options):
+        """
+        Retry a request that was in flight when the pool crashed in its own
+        single-worker pool, so the crash is pinned on the request that caused it.
+        """
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, initializer=_init_worker) as executor:
+                return executor.submit(_extract, source, options).result()
+        except BrokenProcessPool:
+            logger.error("Worker crashed while extracting a document")
+            raise RuntimeError("Worker process crashed")
+
+    def _replace_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("Worker pool crashed, starting a new one")
+                self._executor = self._new_executor()
+        broken.shutdown(wait=False)
+
+    def metrics(self):
+        """
+        Queue depth, request counters and latency percentiles in milliseconds.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = {
+                "workers": self.workers,
+                "queue_depth": self._queued,
+                "max_queue": self.max_queue,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "uptime_s": round(time.time() - self._started, 3)
+            }
+
+        if latencies:
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+            metrics["latency_ms"] = {
+                "count": len(latencies),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 2)
+            }
+        return metrics
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+def parse_options(query):
+    """
+    Extractor options from URL query parameters.
+    """
+    params = parse_qs(query)
+    options = {}
+    if params.get('title_only', [''])[0].lower() in ('1', 'true', 'yes'):
+        options['title_only'] = True
+    if params.get('pages'):
+        options['page_range'] = parse_page_range(params['pages'][0])
+    if params.get('max_headings'):
+        options['max_headings'] = int(params['max_headings'][0])
+    if params.get('local_levels', [''])[0].lower() in ('1', 'true', 'yes'):
+        options['local_levels'] = True
+    # Invalid values raise ValueError here, answered with 400 before reaching a worker
+    DocumentExtractor(**options)
+    return options
+
+def resolve_input_path(path, input_root):
+    """
+    Real path of a PDF requested by path, which must lie inside input_root
+    (relative paths are taken from there). Returns None for any other path,
+    and for every path when input_root is None.
+    """
+    if input_root is None:
+        return None
+    root = os.path.realpath(input_root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([resolved, root]) != root:
+        return None
+    return resolved
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health    liveness check
+    GET  /metrics   queue depth, counters and latency percentiles
+    POST /extract   outline JSON for a PDF sent as the request body
+                    (Content-Type: application/pdf) or referenced by a
+                    JSON body {"path": "..."} inside the input root;
+                    query parameters title_only, pages, max_headings and
+                    local_levels select the extractor options
+    """
+
+    service = None  # Set by serve()
+    input_root = None  # Directory that path requests may read from; None accepts uploads only
+    max_body_bytes = DEFAULT_MAX_BODY_MB * 1024 * 1024  # Larger request bodies are refused with 413
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, {"status": "ok"})
+        elif path == '/metrics':
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/extract':
+            self._send_json(404, {"error": f"Unknown endpoint {url.path}"})
+            return
+
+        try:
+            options = parse_options(url.query)
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError(f"invalid Content-Length {length}")
+            if length > self.max_body_bytes:
+                self.close_connection = True
+                self._send_json(413, {"error": f"Request body of {length} bytes exceeds the limit of "
+                                               f"{self.max_body_bytes} bytes"})
+                return
+            body = self.rfile.read(length)
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+
+            if content_type == 'application/json':
+                path = json.loads(body)["path"]
+                source = resolve_input_path(path, self.input_root)
+                if source is None:
+                    self._send_json(403, {"error": f"Path is outside the input directory: {path}"})
+                    return
+                if not os.path.isfile(source):
+                    self._send_json(404, {"error": f"File not found: {path}"})
+                    return
+            else:
+                source = body
+                if not source:
+                    self._send_json(400, {"error": "Empty request body"})
+                    return
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Bad request: {e}"})
+            return
+
+        try:
+            self._send_json(200, self.service.extract(source, options))
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)})
+        except ValueError as e:
+            # The extractor could not read the document
+            self._send_json(422, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error extracting document: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def serve(host='127.0.0.1', port=8080, workers=None, max_queue=None, input_root=None,
+          max_body_mb=DEFAULT_MAX_BODY_MB):
+    """
+    Run the extraction service until interrupted. Requests by path may
+    only read PDFs inside input_root; without it, PDFs must be uploaded.
+    Request bodies larger than max_body_mb are refused.
+    """
+    service = ExtractionService(workers=workers, max_queue=max_queue)
+    handler = type('BoundExtractionHandler', (ExtractionHandler,), {
+        "service": service,
+        "input_root": input_root,
+        "max_body_bytes": int(max_body_mb * 1024 * 1024)
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    logger.info(f"Serving on http://{host}:{port} with {service.workers} workers")
+    if input_root:
+        logger.info(f"Path requests are served from {input_root}")
+    else:
+        logger.info("Path requests are disabled, PDFs must be uploaded")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+def main():
+    host = os.environ.get('HOST', '127.0.0.1')
+    port = int(os.environ.get('PORT', 8080))
+    workers = int(os.environ.get('WORKERS', default_worker_count()))
+    max_queue = int(os.environ['MAX_QUEUE']) if os.environ.get('MAX_QUEUE') else None
+    # Only PDFs under INPUT_DIR can be requested by path; an empty INPUT_DIR disables path requests
+    input_root = os.environ.get('INPUT_DIR', '/app/input') or None
+    max_body_mb = float(os.environ.get('MAX_BODY_MB', DEFAULT_MAX_BODY_MB))
+    return serve(host, port, workers, max_queue, input_root, max_body_mb)
+
+if __name__ == "__main__":
+    sys.exit(main())
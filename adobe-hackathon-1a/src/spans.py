@@ -0,0 +1,111 @@
+from array import array
+import fitz  # PyMuPDF
+
+# Same as the "dict" defaults minus TEXT_PRESERVE_IMAGES: we never look at
+# image blocks, and copying their pixel data is most of the cost of get_text()
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+class PageSpans:
+    """
+    Compact, column-oriented table of the text lines on one page.
+
+    Every line of every text block becomes one row: the concatenated span
+    text, the largest span font size, the OR of the span font flags, whether
+    any span uses a bold font, the index of the block it belongs to and its
+    bounding box. Numeric columns are stored in arrays, so the table is cheap
+    to keep around and to scan, and both title and heading detection can read
+    it instead of re-parsing the page.
+    """
+
+    __slots__ = ("page_num", "height", "texts", "sizes", "flags", "bold", "blocks", "bboxes")
+
+    def __init__(self, page_num, height=0.0):
+        self.page_num = page_num
+        self.height = height
+        self.texts = []
+        self.sizes = array("d")
+        self.flags = array("I")
+        self.bold = array("B")
+        self.blocks = array("I")
+        self.bboxes = array("d")  # x0, y0, x1, y1 per row
+
+    @classmethod
+    def from_page(cls, page, page_num=None):
+        """
+        Build the table for a PyMuPDF page with a single get_text() call.
+        """
+        table = cls(page.number if page_num is None else page_num, page.rect.height)
+        texts = table.texts
+        sizes = table.sizes
+        flags = table.flags
+        bold = table.bold
+        blocks = table.blocks
+        bboxes = table.bboxes
+
+        block_index = 0
+        for block in page.get_text("dict", flags=TEXT_FLAGS)["blocks"]:
+            lines = block.get("lines")
+            if not lines:
+                continue
+
+            has_rows = False
+            for line in lines:
+                spans = line["spans"]
+                if not spans:
+                    continue
+
+                max_size = 0.0
+                line_flags = 0
+                is_bold = False
+                parts = []
+                for span in spans:
+                    size = span["size"]
+                    if size > max_size:
+                        max_size = size
+                    line_flags |= span["flags"]
+                    if not is_bold and "bold" in span["font"].lower():
+                        is_bold = True
+                    parts.append(span["text"])
+
+                texts.append("".join(parts))
+                sizes.append(max_size)
+                flags.append(line_flags)
+                bold.append(is_bold)
+                blocks.append(block_index)
+                bboxes.extend(line["bbox"])
+                has_rows = True
+
+            if has_rows:
+                block_index += 1
+
+        return table
+
+    def __len__(self):
+        return len(self.texts)
+
+    def bbox(self, row):
+        """
+        Bounding box of a row as an (x0, y0, x1, y1) tuple.
+        """
+        start = row * 4
+        return tuple(self.bboxes[start:start + 4])
+
+    def iter_blocks(self):
+        """
+        Yield (max_size, text) for each text block, in page order. The text
+        joins the block's lines with a trailing space after each line.
+        """
+        count = len(self.texts)
+        row = 0
+        while row < count:
+            block = self.blocks[row]
+            max_size = 0.0
+            parts = []
+            while row < count and self.blocks[row] == block:
+                if self.sizes[row] > max_size:
+                    max_size = self.sizes[row]
+                parts.append(self.texts[row])
+                parts.append(" ")
+                row += 1
+            yield max_size, "".join(parts)
@@ -1,6 +1,7 @@
 import os
-import json
 import logging
+# Re-exported: the JSON writers are shared with Round 1B (see output_writer.py)
+from .output_writer import dumps_json, write_atomic, JsonLinesWriter
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,13 +18,19 @@ def ensure_dir(directory):
         os.makedirs(directory)
         logger.info(f"Created directory: {directory}")
 
-def save_json(data, output_path):
+def save_json(data, output_path, skip_unchanged=False, compact=False):
     """
-    Save data as JSON to the specified path.
+    Save data as JSON to the specified path, atomically.
+    With skip_unchanged, an existing file with identical content is left alone.
     """
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        content = dumps_json(data, compact)
+        if skip_unchanged and os.path.exists(output_path):
+            with open(output_path, 'rb') as f:
+                if f.read() == content:
+                    logger.info(f"JSON at {output_path} is up to date")
+                    return True
+        write_atomic(output_path, content)
         logger.info(f"Saved JSON to {output_path}")
         return True
     except Exception as e:
@@ -32,10 +39,11 @@ def save_json(data, output_path):
 
 def get_pdf_files(input_dir):
     """
-    Get all PDF files from the input directory.
+    Get all PDF files from the input directory, sorted by name so that
+    batches are processed in a deterministic order.
     """
     pdf_files = []
-    for file in os.listdir(input_dir):
+    for file in sorted(os.listdir(input_dir)):
         if file.lower().endswith('.pdf'):
             pdf_files.append(os.path.join(input_dir, file))
     return pdf_files
@@ -46,4 +54,22 @@ def get_output_path(input_path, output_dir):
     """
     filename = os.path.basename(input_path)
     name_without_ext = os.path.splitext(filename)[0]
-    return os.path.join(output_dir, f"{name_without_ext}.json")
\ No newline at end of file
+    return os.path.join(output_dir, f"{name_without_ext}.json")
+
+def parse_page_range(value):
+    """
+    Parse a 1-indexed, inclusive page range such as "3", "1-10" or "5-".
+    Returns a (first, last) tuple, where last is None for an open range.
+    """
+    value = value.strip()
+    if '-' not in value:
+        page = int(value)
+        if page < 1:
+            raise ValueError(f"Invalid page range: {value} (pages are numbered from 1)")
+        return (page, page)
+    first, last = value.split('-', 1)
+    first = int(first) if first.strip() else 1
+    last = int(last) if last.strip() else None
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"Invalid page range: {value} (pages are numbered from 1)")
+    return (first, last)
@@ -0,0 +1,35 @@
+"""
+Batch processing of good and unreadable PDFs.
+
+Usage (from the adobe-hackathon-1a directory):
+    python -m pytest -q tests
+"""
+import os
+import shutil
+from src.batch import process_one, process_pdfs
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOOD_PDF = os.path.join(BASE_DIR, 'input', 'file01.pdf')
+
+def test_unreadable_pdf_fails_without_output(tmp_path):
+    bad_pdf = tmp_path / 'bad.pdf'
+    bad_pdf.write_bytes(b'this is not a PDF')
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+
+    result = process_one(str(bad_pdf), str(output_dir))
+    assert not result["success"]
+    assert result["error"]
+    assert not os.path.exists(result["output_path"])
+
+def test_batch_keeps_going_after_unreadable_pdf(tmp_path):
+    bad_pdf = tmp_path / 'bad.pdf'
+    bad_pdf.write_bytes(b'this is not a PDF')
+    good_pdf = tmp_path / 'good.pdf'
+    shutil.copy(GOOD_PDF, good_pdf)
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+
+    results = process_pdfs([str(bad_pdf), str(good_pdf)], str(output_dir), workers=1)
+    assert [result["success"] for result in results] == [False, True]
+    assert os.listdir(output_dir) == ['good.json']
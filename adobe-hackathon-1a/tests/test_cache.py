@@ -0,0 +1,62 @@
+"""
+Result cache: hits, misses, least-recently-used eviction and invalidation.
+
+Usage (from the adobe-hackathon-1a directory):
+    python -m pytest -q tests
+"""
+import os
+import itertools
+import pytest
+from src import cache as cache_module
+from src.cache import ResultCache
+from src.extractor import DocumentExtractor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF = os.path.join(BASE_DIR, 'input', 'file01.pdf')
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing access times, so eviction order does not depend on timer resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache_module.time, 'time', lambda: float(next(ticks)))
+
+def test_hit_and_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.make_key(PDF, DocumentExtractor())
+    assert cache.get(key) is None
+    cache.put(key, {"title": "T", "outline": []})
+    assert cache.get(key) == {"title": "T", "outline": []}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    cache.close()
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    result = {"title": "x" * 100, "outline": []}
+    cache = ResultCache(str(tmp_path), max_bytes=400)  # Room for three entries
+    for key in ('a', 'b', 'c'):
+        cache.put(key, result)
+    cache.get('a')  # 'b' is now the least recently used
+    cache.put('d', result)
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in ('a', 'c', 'd'))
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+def test_key_changes_with_extractor_version_and_options(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    key = cache.make_key(PDF, DocumentExtractor())
+    cache.put(key, {"title": "T", "outline": []})
+    assert cache.make_key(PDF, DocumentExtractor(max_headings=5)) != key
+
+    monkeypatch.setattr(DocumentExtractor, 'VERSION', DocumentExtractor.VERSION + 1)
+    new_key = cache.make_key(PDF, DocumentExtractor())
+    assert new_key != key
+    assert cache.get(new_key) is None
+    cache.close()
+
+def test_in_memory_source_shares_key_with_path(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    with open(PDF, 'rb') as f:
+        data = f.read()
+    assert cache.make_key(data, DocumentExtractor()) == cache.make_key(PDF, DocumentExtractor())
+    cache.close()
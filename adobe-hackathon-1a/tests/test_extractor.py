@@ -0,0 +1,63 @@
+"""
+Heading options of the extractor against a full run, over the PDFs in input/.
+
+Usage (from the adobe-hackathon-1a directory):
+    python -m pytest -q tests
+"""
+import os
+import glob
+import pytest
+from src.extractor import DocumentExtractor
+from src.utils import parse_page_range
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDFS = sorted(glob.glob(os.path.join(BASE_DIR, 'input', '*.pdf')))
+MAX_HEADINGS = 5
+
+def outline(pdf_path, **options):
+    return DocumentExtractor(**options).extract_document_structure(pdf_path)["outline"]
+
+@pytest.mark.parametrize('pdf_path', PDFS, ids=os.path.basename)
+def test_max_headings_keeps_full_run_levels(pdf_path):
+    full = outline(pdf_path)
+    assert outline(pdf_path, max_headings=MAX_HEADINGS) == full[:MAX_HEADINGS]
+    assert list(DocumentExtractor(max_headings=MAX_HEADINGS).iter_outline(pdf_path)) == full[:MAX_HEADINGS]
+
+@pytest.mark.parametrize('pdf_path', PDFS, ids=os.path.basename)
+def test_page_range_keeps_full_run_levels(pdf_path):
+    full = outline(pdf_path)
+    assert outline(pdf_path, page_range=(2, None)) == [heading for heading in full if heading["page"] >= 2]
+
+@pytest.mark.parametrize('pdf_path', PDFS, ids=os.path.basename)
+def test_local_levels_finds_enough_headings(pdf_path):
+    # Running headers are removed before the early exit counts the headings
+    full = outline(pdf_path)
+    local = outline(pdf_path, max_headings=MAX_HEADINGS, local_levels=True)
+    assert len(local) >= min(MAX_HEADINGS, len(full))
+
+@pytest.mark.parametrize('max_headings', [0, -1])
+def test_max_headings_below_one_is_rejected(max_headings):
+    with pytest.raises(ValueError):
+        DocumentExtractor(max_headings=max_headings)
+
+@pytest.mark.parametrize('page_range', [(0, 0), (0, None), (-1, 3), (3, 2)])
+def test_page_numbers_below_one_are_rejected(page_range):
+    with pytest.raises(ValueError):
+        DocumentExtractor(page_range=page_range)
+
+@pytest.mark.parametrize('value', ['0', '0-3', '3-2', '-0'])
+def test_parse_page_range_rejects_page_zero(value):
+    with pytest.raises(ValueError):
+        parse_page_range(value)
+
+def test_parse_page_range():
+    assert parse_page_range('3') == (3, 3)
+    assert parse_page_range('1-10') == (1, 10)
+    assert parse_page_range('5-') == (5, None)
+    assert parse_page_range('-4') == (1, 4)
+
+def test_max_headings_one_agrees_between_batch_and_streaming():
+    pdf_path = PDFS[0]
+    first = outline(pdf_path)[:1]
+    assert outline(pdf_path, max_headings=1) == first
+    assert list(DocumentExtractor(max_headings=1).iter_outline(pdf_path)) == first
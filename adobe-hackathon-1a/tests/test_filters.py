@@ -0,0 +1,44 @@
+"""
+Running header and footer detection.
+
+Usage (from the adobe-hackathon-1a directory):
+    python -m pytest -q tests
+"""
+import fitz  # PyMuPDF
+from src.filters import RunningHeaderDetector
+from src.extractor import DocumentExtractor
+
+PAGE_HEIGHT = 842
+
+def test_margin_line_repeats_after_min_pages():
+    headers = RunningHeaderDetector(min_pages=3)
+    keys = [headers.key(f"Annual Report - Page {page}", 20, 30, PAGE_HEIGHT) for page in range(1, 4)]
+    # Digits are folded, so the page number does not change the key
+    assert len(set(keys)) == 1
+    assert [headers.observe(keys[0], page) for page in range(3)] == [False, False, True]
+    assert headers.is_repeated(keys[0])
+
+def test_same_page_counts_once_and_body_lines_have_no_key():
+    headers = RunningHeaderDetector(min_pages=2)
+    key = headers.key("Confidential draft", PAGE_HEIGHT - 30, PAGE_HEIGHT - 20, PAGE_HEIGHT)
+    headers.observe(key, 0)
+    headers.observe(key, 0)
+    assert not headers.is_repeated(key)
+    assert headers.key("Body text", 400, 410, PAGE_HEIGHT) is None
+    assert not headers.is_repeated(None)
+
+def test_running_header_is_not_a_heading():
+    titles = ["Overview", "Methods", "Results", "Discussion"]
+    doc = fitz.open()
+    for page_num, title in enumerate(titles):
+        page = doc.new_page(height=PAGE_HEIGHT)
+        page.insert_text((72, 40), f"Running Header {page_num + 1}", fontsize=20)
+        page.insert_text((72, 200), title, fontsize=18)
+        page.insert_text((72, 260), "Body text that is long enough to be a paragraph line.", fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+
+    outline = DocumentExtractor().extract_document_structure(data)["outline"]
+    texts = [heading["text"] for heading in outline]
+    assert not any(text.startswith("Running Header") for text in texts)
+    assert [text for text in texts if text in titles] == titles
@@ -0,0 +1,40 @@
+"""
+Incremental passes over an input directory with a manifest.
+
+Usage (from the adobe-hackathon-1a directory):
+    python -m pytest -q tests
+"""
+import os
+import shutil
+from src.main import process_directory
+from src.manifest import Manifest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOOD_PDF = os.path.join(BASE_DIR, 'input', 'file01.pdf')
+
+def test_corrupt_pdf_is_retried_on_the_next_pass(tmp_path):
+    input_dir = tmp_path / 'input'
+    input_dir.mkdir()
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    shutil.copy(GOOD_PDF, input_dir / 'good.pdf')
+    bad_pdf = input_dir / 'late.pdf'
+    bad_pdf.write_bytes(b'%PDF-1.4 truncated upload')
+    manifest = Manifest.load(str(tmp_path / 'manifest.json'), {})
+
+    assert process_directory(str(input_dir), str(output_dir), workers=1, manifest=manifest) == 1
+    assert os.listdir(output_dir) == ['good.json']
+    assert list(manifest.entries) == [str(input_dir / 'good.pdf')]
+
+    # Nothing changed: the corrupt file is retried, the processed one skipped
+    pdf_files = [str(input_dir / 'good.pdf'), str(bad_pdf)]
+    assert manifest.changed_files(pdf_files) == [str(bad_pdf)]
+    assert process_directory(str(input_dir), str(output_dir), workers=1, manifest=manifest) == 0
+
+    # Once the upload completes, the next pass picks it up
+    shutil.copy(GOOD_PDF, bad_pdf)
+    assert process_directory(str(input_dir), str(output_dir), workers=1, manifest=manifest) == 1
+    assert sorted(os.listdir(output_dir)) == ['good.json', 'late.json']
+
+    reloaded = Manifest.load(str(tmp_path / 'manifest.json'), {})
+    assert sorted(reloaded.entries) == [str(input_dir / 'good.pdf'), str(bad_pdf)]
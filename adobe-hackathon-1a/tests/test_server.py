@@ -0,0 +1,75 @@
+"""
+Path requests of the extraction service.
+
+Usage (from the adobe-hackathon-1a directory):
+    python -m pytest -q tests
+"""
+import os
+import json
+import threading
+import http.client
+from http.server import ThreadingHTTPServer
+import pytest
+from src import server
+from src.server import resolve_input_path, ExtractionHandler
+
+def test_paths_inside_the_input_root_resolve(tmp_path):
+    (tmp_path / 'docs').mkdir()
+    assert resolve_input_path('a.pdf', str(tmp_path)) == os.path.join(os.path.realpath(tmp_path), 'a.pdf')
+    assert resolve_input_path('docs/../a.pdf', str(tmp_path)) == os.path.join(os.path.realpath(tmp_path), 'a.pdf')
+    inside = os.path.join(str(tmp_path), 'docs', 'b.pdf')
+    assert resolve_input_path(inside, str(tmp_path)) == os.path.realpath(inside)
+
+def test_paths_outside_the_input_root_are_rejected(tmp_path):
+    root = tmp_path / 'input'
+    root.mkdir()
+    assert resolve_input_path('../secret.pdf', str(root)) is None
+    assert resolve_input_path('/etc/passwd', str(root)) is None
+    assert resolve_input_path(str(tmp_path / 'input-other' / 'a.pdf'), str(root)) is None
+
+def test_symlink_out_of_the_input_root_is_rejected(tmp_path):
+    root = tmp_path / 'input'
+    root.mkdir()
+    (tmp_path / 'secret.pdf').write_bytes(b'%PDF')
+    os.symlink(tmp_path / 'secret.pdf', root / 'link.pdf')
+    assert resolve_input_path('link.pdf', str(root)) is None
+
+def test_without_input_root_every_path_is_rejected():
+    assert resolve_input_path('a.pdf', None) is None
+
+def test_worker_extractors_are_capped(monkeypatch):
+    monkeypatch.setattr(server, '_extractors', server._extractors.__class__())
+    default = server._get_extractor({})
+    for max_headings in range(1, 3 * server.MAX_EXTRACTORS):
+        server._get_extractor({"max_headings": max_headings})
+        server._get_extractor({})  # Recently used, so it stays
+    assert len(server._extractors) == server.MAX_EXTRACTORS
+    assert server._get_extractor({}) is default
+
+@pytest.fixture
+def http_server():
+    handler = type('TestHandler', (ExtractionHandler,), {"service": None, "input_root": None,
+                                                          "max_body_bytes": 100})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+def post(address, body, content_type='application/pdf'):
+    conn = http.client.HTTPConnection(*address, timeout=10)
+    conn.request('POST', '/extract', body=body, headers={'Content-Type': content_type})
+    response = conn.getresponse()
+    status, data = response.status, json.loads(response.read())
+    conn.close()
+    return status, data
+
+def test_oversized_body_is_refused(http_server):
+    status, data = post(http_server, b'x' * 101)
+    assert status == 413
+    assert "exceeds" in data["error"]
+
+def test_path_request_without_input_root_is_forbidden(http_server):
+    status, _ = post(http_server, json.dumps({"path": "a.pdf"}), 'application/json')
+    assert status == 403
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from pdf_processor import PDFProcessor
+from instrumentation import Instrumentation
+
+DEFAULT_BASELINE = os.path.join(BASE_DIR, 'benchmark_baseline.json')
+
+def find_test_cases(test_cases_dir):
+    """Return (name, input_dir, scenario) for every test case with an input scenario"""
+    test_cases = []
+    for name in sorted(os.listdir(test_cases_dir)):
+        input_dir = os.path.join(test_cases_dir, name, 'Input')
+        for scenario_name in ('input_scnerio.json', 'input_scenario.json'):
+            scenario_file = os.path.join(input_dir, scenario_name)
+            if os.path.exists(scenario_file):
+                with open(scenario_file, 'r', encoding='utf-8') as f:
+                    test_cases.append((name, input_dir, json.load(f)))
+                break
+    return test_cases
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers"""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(p * (len(values) - 1)))))]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count()
+    }
+
+def run_benchmark(test_cases, model_path, repeat, warmup, verbose=False, workers=None, cache_dir=None):
+    """Run every test case repeat times (cold in-memory caches each run) and collect the metrics"""
+    instrumentation = Instrumentation()
+    output = None if verbose else open(os.devnull, 'w')
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        processor = PDFProcessor(model_path=model_path, max_workers=workers, instrumentation=instrumentation,
+                                 cache_dir=cache_dir)
+        # Load the model up front, so it is not charged to the first measured run
+        processor.load_model()
+    model_load_s = instrumentation.report()["stages"]["model_load"]["wall_s"]
+
+    scenario_latencies = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for run in range(warmup + repeat):
+            measured = run >= warmup
+            for name, input_dir, scenario in test_cases:
+                processor.clear_caches()
+                processor.instrumentation = instrumentation if measured else Instrumentation()
+                output_path = os.path.join(output_dir, 'challenge1b_output.json')
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+                    processor.process_documents(scenario, input_dir, output_path)
+                if measured:
+                    scenario_latencies.setdefault(name, []).append(time.perf_counter() - start)
+    if output:
+        output.close()
+
+    report = instrumentation.report()
+    documents = {
+        name: stages for name, stages in report["documents"].items() if name != '(global)'
+    }
+    # A document's own stages (parsing, header detection) leave out the embedding,
+    # similarity and subsection stages shared by its test case, so this is only a
+    # breakdown; the latency percentiles are taken over whole test case runs
+    document_stage_times = [
+        sum(stats["wall_s"] for stats in stages.values()) / repeat for stages in documents.values()
+    ]
+    run_latencies = [latency for latencies in scenario_latencies.values() for latency in latencies]
+    pages = sum(stages.get("text_extraction", {}).get("calls", 0) for stages in documents.values()) // repeat
+    # Test cases may list documents that are not bundled; only the ones on disk are processed
+    document_count = sum(
+        os.path.exists(os.path.join(input_dir, doc["file_name"]))
+        for _, input_dir, scenario in test_cases
+        for doc in scenario["document_collection"]
+    )
+    elapsed = sum(sum(latencies) for latencies in scenario_latencies.values())
+
+    return {
+        "pipeline": "1b",
+        "machine": machine_info(),
+        "test_cases": len(test_cases),
+        "documents": document_count,
+        "pages": pages,
+        "repeat": repeat,
+        "workers": processor.max_workers,
+        "model_load_s": round(model_load_s, 4),
+        "elapsed_s": round(elapsed, 4),
+        "throughput": {
+            "docs_per_s": round(document_count * repeat / elapsed, 3),
+            "pages_per_s": round(pages * repeat / elapsed, 3)
+        },
+        "latency_s": {
+            "p50": round(percentile(run_latencies, 0.50), 4),
+            "p95": round(percentile(run_latencies, 0.95), 4),
+            "max": round(max(run_latencies, default=0.0), 4)
+        },
+        "document_stage_s": {
+            "p50": round(percentile(document_stage_times, 0.50), 4),
+            "max": round(max(document_stage_times, default=0.0), 4)
+        },
+        "scenario_latency_s": {
+            name: round(percentile(latencies, 0.5), 4) for name, latencies in scenario_latencies.items()
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": {
+            name: stats for name, stats in report["stages"].items() if name != "model_load"
+        }
+    }
+
+def compare(results, baseline, tolerance):
+    """Return regression messages for metrics worse than the baseline by more than tolerance"""
+    checks = [
+        ("throughput.docs_per_s", results["throughput"]["docs_per_s"], baseline["throughput"]["docs_per_s"], False),
+        ("throughput.pages_per_s", results["throughput"]["pages_per_s"], baseline["throughput"]["pages_per_s"], False),
+        ("latency_s.p50", results["latency_s"]["p50"], baseline["latency_s"]["p50"], True),
+        ("latency_s.p95", results["latency_s"]["p95"], baseline["latency_s"]["p95"], True),
+        ("peak_rss_mb", results["peak_rss_mb"], baseline["peak_rss_mb"], True),
+    ]
+    for name, reference in baseline.get("scenario_latency_s", {}).items():
+        if name in results["scenario_latency_s"]:
+            checks.append((f"scenario_latency_s.{name}", results["scenario_latency_s"][name], reference, True))
+
+    regressions = []
+    for name, current, reference, higher_is_worse in checks:
+        if higher_is_worse:
+            regressed = current > reference * (1 + tolerance)
+        else:
+            regressed = current < reference * (1 - tolerance)
+        if regressed:
+            regressions.append(f"{name}: {current} vs baseline {reference} ({(current / reference - 1) * 100:+.0f}%)")
+    return regressions
+
+def print_summary(results):
+    print(f"{results['test_cases']} test cases, {results['documents']} documents, "
+          f"{results['pages']} pages, {results['repeat']} run(s), {results['workers']} worker(s)")
+    print(f"model load   {results['model_load_s']:.2f}s")
+    print(f"throughput   {results['throughput']['docs_per_s']:.2f} docs/s   {results['throughput']['pages_per_s']:.2f} pages/s")
+    print(f"latency      p50 {results['latency_s']['p50']:.2f}s   p95 {results['latency_s']['p95']:.2f}s   "
+          f"max {results['latency_s']['max']:.2f}s per test case run")
+    print(f"doc stages   p50 {results['document_stage_s']['p50']:.2f}s   "
+          f"max {results['document_stage_s']['max']:.2f}s per document (own stages only)")
+    for name, latency in results["scenario_latency_s"].items():
+        print(f"  {name:<20} {latency:8.2f}s")
+    print(f"peak RSS     {results['peak_rss_mb']:.1f} MB")
+    for name, stats in results["stages"].items():
+        print(f"  {name:<20} {stats['wall_s']:8.2f}s wall {stats['cpu_s']:8.2f}s CPU  ({stats['calls']} calls)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the persona-driven pipeline on the bundled test cases')
+    parser.add_argument('--model', default=os.path.join(BASE_DIR, 'models', 'all-MiniLM-L6-v2'), help='Model directory')
+    parser.add_argument('--test_cases_dir', default=os.path.join(BASE_DIR, 'Test cases'), help='Directory with the test cases')
+    parser.add_argument('--repeat', type=int, default=1, help='Measured runs over all test cases')
+    parser.add_argument('--warmup', type=int, default=0, help='Unmeasured runs before measuring')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown before failing')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--output', default=None, help='Also write the results JSON here')
+    parser.add_argument('--workers', type=int, default=None, help='Document parsing processes (default: CPU count - 1)')
+    parser.add_argument('--cache_dir', default=None, help='Use a persistent embedding store (measures warm runs once filled)')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+    args = parser.parse_args()
+
+    test_cases = find_test_cases(args.test_cases_dir)
+    if not test_cases:
+        print("No test cases found")
+        return 1
+
+    results = run_benchmark(test_cases, args.model, args.repeat, args.warmup, args.verbose, args.workers,
+                            args.cache_dir)
+    print_summary(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != results["machine"]:
+        print("Note: baseline was recorded on a different machine, comparisons are indicative only")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ PERFORMANCE REGRESSION (tolerance {args.tolerance:.0%}):")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+
+    print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from pdf_processor import PDFProcessor
+from instrumentation import Instrumentation
+from encoders import ENCODERS
+from benchmark import find_test_cases, machine_info
+
+def run_encoder(encoder, test_cases, model_path, repeat, verbose=False):
+    """Run every test case with one encoder; returns the outputs and embedding/total times per test case"""
+    output = None if verbose else open(os.devnull, 'w')
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        instrumentation = Instrumentation()
+        processor = PDFProcessor(model_path=model_path, instrumentation=instrumentation, encoder=encoder)
+        # The model is loaded lazily; load it here so its time is reported and not charged to a test case
+        processor.load_model()
+        results = {}
+        with tempfile.TemporaryDirectory() as output_dir:
+            for name, input_dir, scenario in test_cases:
+                embedding_s = []
+                total_s = []
+                for _ in range(repeat):
+                    processor.clear_caches()
+                    processor.instrumentation = Instrumentation()
+                    result, processing_time = processor.process_documents(
+                        scenario, input_dir, os.path.join(output_dir, 'challenge1b_output.json'))
+                    embedding_s.append(processor.instrumentation.report()["stages"]["embedding"]["wall_s"])
+                    total_s.append(processing_time)
+                results[name] = {"output": result, "embedding_s": min(embedding_s), "total_s": min(total_s)}
+    if output:
+        output.close()
+    return {
+        "model_load_s": round(instrumentation.report()["stages"]["model_load"]["wall_s"], 3),
+        "test_cases": results
+    }
+
+def ranking(output):
+    return [(s["document"], s["page_number"], s["section_title"]) for s in output["extracted_sections"]]
+
+def compare_rankings(output, reference):
+    """Agreement of a ranking with the fp32 one: top-10 overlap, identical order and identical top 3"""
+    current, expected = ranking(output), ranking(reference)
+    overlap = len(set(current) & set(expected)) / max(1, len(expected))
+    return {
+        "overlap_at_10": round(overlap, 3),
+        "same_order": current == expected,
+        "same_top_3": current[:3] == expected[:3]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Check quantized/ONNX encoders against the fp32 ranking and '
+                                                 'compare their throughput on the bundled test cases')
+    parser.add_argument('--model', default=os.path.join(BASE_DIR, 'models', 'all-MiniLM-L6-v2'), help='Model directory')
+    parser.add_argument('--test_cases_dir', default=os.path.join(BASE_DIR, 'Test cases'), help='Directory with the test cases')
+    parser.add_argument('--encoders', nargs='+', default=[e for e in ENCODERS if e != 'torch'], choices=ENCODERS,
+                        help='Encoders to check against fp32 torch')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per test case (the fastest one is reported)')
+    parser.add_argument('--min_overlap', type=float, default=0.9, help='Minimum top-10 overlap with the fp32 ranking')
+    parser.add_argument('--output', default=None, help='Also write the results JSON here')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+    args = parser.parse_args()
+
+    test_cases = find_test_cases(args.test_cases_dir)
+    if not test_cases:
+        print("No test cases found")
+        return 1
+
+    reference = run_encoder('torch', test_cases, args.model, args.repeat, args.verbose)
+    report = {"machine": machine_info(), "encoders": {"torch": {"model_load_s": reference["model_load_s"]}}}
+    print(f"{'encoder':<12} {'test case':<20} {'embed s':>8} {'speedup':>8} {'total s':>8} {'overlap@10':>10}  order  top 3")
+    for name, result in reference["test_cases"].items():
+        print(f"{'torch':<12} {name:<20} {result['embedding_s']:8.2f} {1.0:8.2f} {result['total_s']:8.2f} "
+              f"{1.0:10.2f}  (reference)")
+
+    failures = []
+    for encoder in args.encoders:
+        current = run_encoder(encoder, test_cases, args.model, args.repeat, args.verbose)
+        report["encoders"][encoder] = {"model_load_s": current["model_load_s"], "test_cases": {}}
+        for name, result in current["test_cases"].items():
+            expected = reference["test_cases"][name]
+            agreement = compare_rankings(result["output"], expected["output"])
+            speedup = expected["embedding_s"] / max(result["embedding_s"], 1e-9)
+            report["encoders"][encoder]["test_cases"][name] = {
+                "embedding_s": round(result["embedding_s"], 3),
+                "embedding_speedup": round(speedup, 2),
+                "total_s": round(result["total_s"], 3),
+                **agreement
+            }
+            print(f"{encoder:<12} {name:<20} {result['embedding_s']:8.2f} {speedup:8.2f} {result['total_s']:8.2f} "
+                  f"{agreement['overlap_at_10']:10.2f}  {'yes' if agreement['same_order'] else 'no ':<5}  "
+                  f"{'yes' if agreement['same_top_3'] else 'no'}")
+            if agreement["overlap_at_10"] < args.min_overlap:
+                failures.append(f"{encoder} on {name}: top-10 overlap {agreement['overlap_at_10']:.2f} "
+                                f"below {args.min_overlap:.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if failures:
+        print("❌ Encoders disagree with the fp32 ranking:")
+        for message in failures:
+            print(f"  {message}")
+        return 1
+    print(f"✅ All encoders keep a top-10 overlap of at least {args.min_overlap:.2f} with fp32")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import os
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from instrumentation import Instrumentation, stage
+from pdf_backends import get_backend, body_font_size, OutlineBackend
+from sections import Section, pack_sections
+from output_writer import write_json
+
+# Backends of this worker process, by name
+_backends = {}
+
+def parse_document(pdf_source, backend, max_pages=None, instrumentation=None, outline_path=None, with_all_text=False):
+    """Split a PDF (path or in-memory data) into Section records with titles and page numbers; returns
+    (sections, all_text), where all_text (the text of every page) is None unless with_all_text is set
+    
+    With the outline backend, sections start at the Round 1A headings and the 1A outline JSON from the same
+    parse is written to outline_path if given.
+    """
+    if isinstance(backend, OutlineBackend):
+        return parse_document_outline(pdf_source, backend, max_pages, instrumentation, outline_path, with_all_text)
+    
+    page_texts = [] if with_all_text else None
+    
+    try:
+        # Section text is collected in one list and joined once into the document's text buffer;
+        # each section is a (start, end) slice of it
+        parts = []
+        length = 0
+        bounds = []  # (title, page, start, end) of every section with text
+        title, page, start, has_text = "Introduction", 1, 0, False
+        
+        # All pages are processed unless max_pages is set
+        pages = list(backend.iter_pages(pdf_source, instrumentation, max_pages))
+        
+        # With font information, headers must also stand out from the document's body text
+        with stage(instrumentation, "header_detection"):
+            document_body_size = body_font_size(line for _, lines in pages for line in lines)
+        
+        for page_num, lines in pages:
+            text = "\n".join(line for line, _, _ in lines)
+            if not text or len(text.strip()) < 10:  # Skip nearly empty pages
+                continue
+            
+            # Add to all text
+            if page_texts is not None:
+                page_texts.append(text)
+            
+            # Look for section headers (usually in bold or larger font)
+            with stage(instrumentation, "header_detection"):
+                # Pages where nothing stands out fall back to the text heuristic alone
+                body_size = document_body_size
+                if body_size is not None and not any(bold or size > body_size + 0.5 for _, size, bold in lines):
+                    body_size = None
+                
+                for line, size, bold in lines:
+                    # Optimized heuristic for section headers
+                    stripped_line = line.strip()
+                    # Skip very long lines immediately
+                    if len(stripped_line) < 80 and (  # Reduced from 100 to 80 for better header detection
+                        # Enhanced header detection
+                        stripped_line and
+                        (body_size is None or bold or size > body_size + 0.5) and
+                        ((not stripped_line.endswith('.') and
+                        len(stripped_line.split()) <= 8 and  # Reduced from 10 to 8
+                        any(word[0].isupper() for word in stripped_line.split() if word)) or
+                        (stripped_line.endswith(':')) or
+                        (stripped_line[0].isdigit() and '.' in stripped_line[:5]))):
+                        
+                        # Save previous section if it has content
+                        if has_text:
+                            bounds.append((title, page, start, length))
+                        
+                        # Start new section
+                        title, page, start, has_text = stripped_line, page_num, length, False
+                    else:
+                        parts.append(line)
+                        parts.append("\n")
+                        length += len(line) + 1
+                        has_text = has_text or bool(stripped_line)
+        
+        # Add the last section
+        if has_text:
+            bounds.append((title, page, start, length))
+        
+        buffer = "".join(parts)
+        sections = [Section(title, page, buffer, start, end) for title, page, start, end in bounds]
+    
+    except Exception as e:
+        source_name = pdf_source if isinstance(pdf_source, (str, os.PathLike)) else "in-memory PDF"
+        print(f"Error processing {source_name}: {str(e)}")
+        return [], "" if with_all_text else None
+    
+    return sections, "".join(text + "\n" for text in page_texts) if with_all_text else None
+
+def parse_document_outline(pdf_source, backend, max_pages=None, instrumentation=None, outline_path=None,
+                           with_all_text=False):
+    """Sections of a PDF split at its Round 1A outline headings; one parse also gives the 1A outline JSON,
+    written to outline_path if given. Returns (sections, all_text) like parse_document"""
+    try:
+        model = backend.parse(pdf_source, instrumentation, max_pages)
+        sections = pack_sections((section["title"], section["page"], section["text"])
+                                 for section in model.sections())
+        all_text = None
+        if with_all_text:
+            all_text = "\n".join(model.page_text(index) for index in range(len(model.pages)))
+        
+        if outline_path:
+            with stage(instrumentation, "outline_output"):
+                write_json(model.to_outline(), outline_path)
+    
+    except Exception as e:
+        source_name = pdf_source if isinstance(pdf_source, (str, os.PathLike)) else "in-memory PDF"
+        print(f"Error processing {source_name}: {str(e)}")
+        return [], "" if with_all_text else None
+    
+    return sections, all_text
+
+def outline_output_path(outline_dir, file_name):
+    """Round 1A output path of a document: <outline_dir>/<PDF name without extension>.json"""
+    if not outline_dir:
+        return None
+    return os.path.join(outline_dir, os.path.splitext(os.path.basename(file_name))[0] + '.json')
+
+def _parse_task(file_name, file_path, backend_name, max_pages, outline_dir=None):
+    """Worker task: parse one document and return its sections together with its stage timings"""
+    backend = _backends.get(backend_name)
+    if backend is None:
+        backend = _backends[backend_name] = get_backend(backend_name)
+    instrumentation = Instrumentation()
+    with instrumentation.document(file_name):
+        sections, _ = parse_document(file_path, backend, max_pages, instrumentation,
+                                     outline_output_path(outline_dir, file_name))
+    return sections, instrumentation.document_stages(file_name)
+
+def _parse_isolated(file_name, file_path, backend_name, max_pages, outline_dir=None):
+    """Re-parse a document that was in flight when a worker died, in its own single-worker pool"""
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            return executor.submit(_parse_task, file_name, file_path, backend_name, max_pages,
+                                   outline_dir).result()
+    except BrokenProcessPool:
+        print(f"Error processing {file_name}: worker process crashed")
+        return None, {}
+
+def iter_parsed_documents(documents, backend_name, max_pages=None, workers=1, on_started=None, outline_dir=None):
+    """Parse (file_name, file_path) documents in worker processes and yield (file_name, sections, stages)
+    as each one finishes; sections is None if the document crashed its worker
+    
+    on_started is called in this process once the workers are busy (before parsing when there is only
+    one worker), so the caller can do its own work, such as loading the model, while documents are parsed.
+    With the outline backend and an outline_dir, each worker also writes the document's Round 1A outline JSON.
+    """
+    workers = max(1, min(workers, len(documents)))
+    if workers == 1:
+        if on_started is not None:
+            on_started()
+        for file_name, file_path in documents:
+            print(f"Processing document: {file_name}")
+            yield (file_name,) + _parse_task(file_name, file_path, backend_name, max_pages, outline_dir)
+        return
+    
+    unfinished = dict(documents)
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        future_to_doc = {}
+        for file_name, file_path in documents:
+            print(f"Processing document: {file_name}")
+            future = executor.submit(_parse_task, file_name, file_path, backend_name, max_pages, outline_dir)
+            future_to_doc[future] = file_name
+        # All workers exist by now, so nothing on_started does (e.g. importing torch) is forked into them
+        if on_started is not None:
+            on_started()
+        
+        # Stream results back in completion order
+        for future in concurrent.futures.as_completed(future_to_doc):
+            file_name = future_to_doc[future]
+            try:
+                sections, stages = future.result()
+            except BrokenProcessPool:
+                break
+            del unfinished[file_name]
+            yield file_name, sections, stages
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    # A worker crashed: every document still unfinished is retried on its own so only the culprit fails
+    if unfinished:
+        print(f"Worker pool crashed, retrying {len(unfinished)} document(s) in isolation")
+        for file_name, file_path in unfinished.items():
+            yield (file_name,) + _parse_isolated(file_name, file_path, backend_name, max_pages, outline_dir)
@@ -0,0 +1,236 @@
+import os
+import time
+import hashlib
+import sqlite3
+import numpy as np
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 100000
+
+class EmbeddingStore:
+    """Persistent embedding cache: a memory-mapped float32 matrix plus a SQLite hash index
+
+    Entries are keyed by a hash of the model id and the full text. Vectors live in fixed
+    slots of vectors.bin; index.sqlite (WAL mode) maps keys to slots and keeps access times,
+    and once max_entries slots are in use the least recently used entry is overwritten.
+    Every slot also carries the key digest and a version counter that is odd while the slot
+    is being written, so a reader racing with an eviction in another process sees either
+    the complete vector it asked for or a miss, never a torn or foreign vector.
+    """
+
+    def __init__(self, store_dir, model_id, dim, max_entries=DEFAULT_MAX_ENTRIES):
+        self.model_id = model_id
+        self.dim = dim
+        # One subdirectory per model, so models with different dimensions never share a matrix
+        self.store_dir = os.path.join(store_dir, hashlib.sha256(model_id.encode('utf-8')).hexdigest()[:16])
+        self.db_path = os.path.join(self.store_dir, 'index.sqlite')
+        self.vectors_path = os.path.join(self.store_dir, 'vectors.bin')
+        # Raw bytes for the digest: an 'S16' field would strip trailing NUL bytes
+        self.dtype = np.dtype([('version', '<u8'), ('digest', 'u1', (16,)), ('vector', '<f4', (dim,))])
+        self.max_entries = max_entries
+        self._conn = None
+        self._records = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Connections and mappings cannot cross process boundaries; they are reopened lazily
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_records'] = None
+        state['_pid'] = None
+        return state
+
+    def _connect(self):
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                     'key BLOB PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, last_access REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # The first process to open the store fixes its capacity and dimension; a store of
+            # another dimension cannot serve this model, another capacity is kept with a warning
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('capacity', ?), ('dim', ?), ('next_slot', 0), "
+                         "('hits', 0), ('misses', 0), ('evictions', 0)", (self.max_entries, self.dim))
+            meta = dict(conn.execute('SELECT name, value FROM meta').fetchall())
+            if meta['dim'] != self.dim:
+                raise ValueError(f"Embedding store {self.store_dir} holds {meta['dim']}-dimensional vectors, "
+                                 f"not {self.dim}")
+            if meta['capacity'] != self.max_entries:
+                print(f"Warning: embedding store {self.store_dir} was created with a capacity of "
+                      f"{meta['capacity']} entries; keeping it instead of the requested {self.max_entries}")
+            self.max_entries = meta['capacity']
+            size = self.max_entries * self.dtype.itemsize
+            # Allocate the matrix as a sparse file; pages are only backed once written
+            with open(self.vectors_path, 'ab') as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            conn.close()
+            raise
+
+        self._records = np.memmap(self.vectors_path, dtype=self.dtype, mode='r+', shape=(self.max_entries,))
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def make_key(self, text):
+        """16-byte key for a text embedded by this store's model"""
+        digest = hashlib.sha256(self.model_id.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.digest()[:16]
+
+    def _read_slot(self, slot, key):
+        """Copy a slot's vector if it is complete and belongs to key, else return None"""
+        records = self._records
+        version = int(records['version'][slot])
+        if version % 2:
+            return None
+        stored_key = records['digest'][slot].tobytes()
+        vector = np.array(records['vector'][slot], dtype=np.float32)
+        if int(records['version'][slot]) != version or stored_key != key:
+            return None
+        return vector
+
+    def _write_slot(self, slot, key, vector):
+        records = self._records
+        version = int(records['version'][slot])
+        records['version'][slot] = version + 1
+        records['digest'][slot] = np.frombuffer(key, dtype=np.uint8)
+        records['vector'][slot] = vector
+        records['version'][slot] = version + 2
+
+    def get_many(self, texts):
+        """Return a list with the stored embedding of each text, or None where it is missing"""
+        conn = self._connect()
+        keys = [self.make_key(text) for text in texts]
+        slots = {}
+        # Stay below SQLite's limit on query parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            query = f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(chunk))})"
+            slots.update(conn.execute(query, chunk).fetchall())
+
+        results = []
+        hits = []
+        for key in keys:
+            vector = self._read_slot(slots[key], key) if key in slots else None
+            results.append(vector)
+            if vector is not None:
+                hits.append((time.time(), key))
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('UPDATE entries SET last_access = ? WHERE key = ?', hits)
+            conn.execute("UPDATE meta SET value = value + ? WHERE name = 'hits'", (len(hits),))
+            conn.execute("UPDATE meta SET value = value + ? WHERE name = 'misses'", (len(keys) - len(hits),))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return results
+
+    def put_many(self, texts, vectors):
+        """Store embeddings, overwriting the least recently used entries once the store is full"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            next_slot = conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()[0]
+            evictions = 0
+            now = time.time()
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(text)
+                row = conn.execute('SELECT slot FROM entries WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+                    continue
+
+                if next_slot < self.max_entries:
+                    slot = next_slot
+                    next_slot += 1
+                else:
+                    victim, slot = conn.execute(
+                        'SELECT key, slot FROM entries ORDER BY last_access LIMIT 1').fetchone()
+                    conn.execute('DELETE FROM entries WHERE key = ?', (victim,))
+                    evictions += 1
+
+                self._write_slot(slot, key, vector)
+                conn.execute('INSERT INTO entries (key, slot, last_access) VALUES (?, ?, ?)', (key, slot, now))
+
+            self._records.flush()
+            conn.execute("UPDATE meta SET value = ? WHERE name = 'next_slot'", (next_slot,))
+            conn.execute("UPDATE meta SET value = value + ? WHERE name = 'evictions'", (evictions,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def stats(self):
+        """Hit/miss/eviction counters of all processes using the store plus its fill level"""
+        conn = self._connect()
+        meta = dict(conn.execute('SELECT name, value FROM meta').fetchall())
+        entries = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        lookups = meta['hits'] + meta['misses']
+        return {
+            "entries": entries,
+            "capacity": meta['capacity'],
+            "hits": meta['hits'],
+            "misses": meta['misses'],
+            "evictions": meta['evictions'],
+            "hit_rate": round(meta['hits'] / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._records.flush()
+            self._conn.close()
+        self._conn = None
+        self._records = None
+        self._pid = None
+
+class EmbeddingLRUCache:
+    """Size-bounded in-memory LRU cache of embeddings, owned by one processor, with hit-rate statistics"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        """Return the cached embedding of text, or None on a miss"""
+        vector = self._entries.get(text)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(text)
+        self.hits += 1
+        return vector
+
+    def put(self, text, vector):
+        self._entries[text] = vector
+        self._entries.move_to_end(text)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
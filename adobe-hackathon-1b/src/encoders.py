@@ -0,0 +1,181 @@
+import os
+import json
+import inspect
+import numpy as np
+
+ENCODERS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+
+# Weight files whose modification time invalidates an exported ONNX model
+WEIGHT_FILES = ('model.safetensors', 'pytorch_model.bin')
+
+def _import_onnxruntime():
+    # Imported on demand: onnxruntime is optional and slows down startup
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError("The onnx encoders require onnxruntime (pip install onnxruntime)") from None
+    return onnxruntime
+
+def read_model_config(model_path):
+    """Max sequence length, pooling mode, normalisation and embedding dimension (None if unknown) from a
+    sentence-transformers model directory, without loading the model"""
+    max_seq_length = 512
+    config_path = os.path.join(model_path, 'sentence_bert_config.json')
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            max_seq_length = json.load(f).get('max_seq_length', max_seq_length)
+
+    pooling, normalize, dim = 'mean', False, None
+    modules = []
+    modules_path = os.path.join(model_path, 'modules.json')
+    if os.path.exists(modules_path):
+        with open(modules_path, 'r', encoding='utf-8') as f:
+            modules = json.load(f)
+    for module in modules:
+        if module['type'].endswith('Pooling'):
+            with open(os.path.join(model_path, module['path'], 'config.json'), 'r', encoding='utf-8') as f:
+                pooling_config = json.load(f)
+            dim = pooling_config['word_embedding_dimension']
+            if pooling_config.get('pooling_mode_cls_token'):
+                pooling = 'cls'
+            elif not pooling_config.get('pooling_mode_mean_tokens'):
+                pooling = 'other'
+        elif module['type'].endswith('Normalize'):
+            normalize = True
+    return max_seq_length, pooling, normalize, dim
+
+def load_encoder(model_path, encoder='torch'):
+    """Load the sentence encoder for a local model directory
+
+    'torch' is the fp32 SentenceTransformer, 'torch-int8' the same model with dynamically
+    quantized int8 linear layers, and 'onnx'/'onnx-int8' run an ONNX export of the model
+    (fp32 or dynamically quantized) on ONNX Runtime. All of them only read model_path.
+    """
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unknown encoder: {encoder} (choose from {', '.join(ENCODERS)})")
+    if encoder.startswith('onnx'):
+        return OnnxEncoder(model_path, quantize=encoder == 'onnx-int8')
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_path, device='cpu')
+    if encoder == 'torch-int8':
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+class OnnxEncoder:
+    """SentenceTransformer-compatible encoder (encode, tokenizer, max_seq_length) on ONNX Runtime
+
+    The transformer is exported to <model_path>/onnx/model.onnx on first use (and quantized to
+    model_int8.onnx for quantize=True); pooling and normalisation follow the model's modules.json.
+    """
+
+    def __init__(self, model_path, quantize=False):
+        onnxruntime = _import_onnxruntime()
+        from transformers import AutoTokenizer
+
+        self.model_path = model_path
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self.max_seq_length, self.pooling, self.normalize, self.dim = read_model_config(model_path)
+        if self.pooling not in ('mean', 'cls'):
+            raise ValueError(f"Unsupported pooling in {model_path}: only mean and CLS pooling are exported")
+
+        onnx_dir = os.path.join(model_path, 'onnx')
+        onnx_path = os.path.join(onnx_dir, 'model.onnx')
+        if self._is_stale(onnx_path):
+            self._export(onnx_path)
+        if quantize:
+            quantized_path = os.path.join(onnx_dir, 'model_int8.onnx')
+            if not os.path.exists(quantized_path) or os.path.getmtime(quantized_path) < os.path.getmtime(onnx_path):
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                quantize_dynamic(onnx_path, quantized_path + '.tmp', weight_type=QuantType.QInt8)
+                os.replace(quantized_path + '.tmp', quantized_path)
+            onnx_path = quantized_path
+
+        self.session = onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def _is_stale(self, onnx_path):
+        if not os.path.exists(onnx_path):
+            return True
+        weights = [os.path.join(self.model_path, name) for name in WEIGHT_FILES]
+        return any(os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(onnx_path) for path in weights)
+
+    def _export(self, onnx_path):
+        """Export the transformer to ONNX with dynamic batch and sequence axes and check it against PyTorch"""
+        import torch
+        from transformers import AutoModel
+
+        model = AutoModel.from_pretrained(self.model_path, local_files_only=True).eval()
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids')
+                       if name in self.tokenizer.model_input_names]
+
+        class Transformer(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, input_ids, attention_mask, token_type_ids=None):
+                if token_type_ids is None:
+                    return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+                return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                                  token_type_ids=token_type_ids).last_hidden_state
+
+        # A padded sample batch, so the attention mask is not traced as all ones
+        sample = self.tokenizer(["Export sample", "A longer export sample sentence with padding"],
+                                padding=True, return_tensors='pt')
+        inputs = tuple(sample[name] for name in input_names)
+
+        os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            batch = torch.export.Dim('batch')
+            sequence = torch.export.Dim('sequence', max=self.max_seq_length)
+            torch.onnx.export(Transformer(model), inputs, onnx_path + '.tmp', input_names=input_names,
+                              output_names=['last_hidden_state'], dynamo=True, external_data=False,
+                              dynamic_shapes={name: {0: batch, 1: sequence} for name in input_names})
+        else:
+            axes = {0: 'batch', 1: 'sequence'}
+            torch.onnx.export(Transformer(model), inputs, onnx_path + '.tmp', input_names=input_names,
+                              output_names=['last_hidden_state'], opset_version=14,
+                              dynamic_axes={name: axes for name in input_names + ['last_hidden_state']})
+
+        # Compare with PyTorch on a batch of another shape before the export is used
+        check = self.tokenizer(["Check", "The exported model must match PyTorch", "on a batch of another shape"],
+                               padding=True, return_tensors='pt')
+        with torch.no_grad():
+            expected = model(**{name: check[name] for name in input_names}).last_hidden_state.numpy()
+        session = _import_onnxruntime().InferenceSession(onnx_path + '.tmp', providers=['CPUExecutionProvider'])
+        actual = session.run(None, {name: check[name].numpy() for name in input_names})[0]
+        if np.abs(actual - expected).max() > 1e-3:
+            os.remove(onnx_path + '.tmp')
+            raise RuntimeError(f"ONNX export of {self.model_path} does not match the PyTorch model")
+        os.replace(onnx_path + '.tmp', onnx_path)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, **kwargs):
+        """Embed a list of texts; returns a float32 array with one row per text"""
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        # Like SentenceTransformer.encode, batch texts of similar length to limit padding
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]), reverse=True)
+        embeddings = []
+        for start in range(0, len(order), batch_size):
+            batch = [sentences[i] for i in order[start:start + batch_size]]
+            encoded = self.tokenizer(batch, padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors='np')
+            hidden = self.session.run(None, {name: encoded[name].astype(np.int64) for name in self.input_names})[0]
+            if self.pooling == 'cls':
+                pooled = hidden[:, 0]
+            else:
+                mask = encoded['attention_mask'][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.normalize:
+                pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            embeddings.append(pooled.astype(np.float32))
+        if not embeddings:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        result = np.empty((len(order), embeddings[0].shape[1]), dtype=np.float32)
+        result[order] = np.concatenate(embeddings)
+        return result
@@ -0,0 +1,198 @@
+"""
+Per-stage timing, profiling and memory instrumentation shared by Round 1A
+and Round 1B.
+
+adobe-hackathon-1a/src/instrumentation.py and adobe-hackathon-1b/src/instrumentation.py
+are kept as byte-identical copies, like output_writer.py. Each round is
+built into its own container from its own directory (see the
+Dockerfiles), so 1B cannot import 1A's copy at run time. Edit both
+copies together; adobe-hackathon-1b/tests/test_shared_modules.py fails
+when they differ.
+"""
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+class Instrumentation:
+    """
+    Records wall and CPU time per processing stage, per document and in
+    aggregate, and renders them as a JSON-serialisable report.
+
+    Stages may nest; each stage is charged only its own (exclusive) time,
+    so the stage totals of a document add up to the time spent on it.
+    CPU time is measured per thread. Optionally a cProfile profile of the
+    calling thread and tracemalloc peak memory are captured as well.
+    """
+
+    def __init__(self, profile=False, trace_memory=False, top_n=25):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._documents = {}  # document -> stage -> [calls, wall_s, cpu_s]
+        self._started = time.perf_counter()
+        self._profiler = None
+        self._trace_memory = trace_memory
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def document(self, name):
+        """
+        Attribute stages recorded by this thread to a document.
+        """
+        previous = getattr(self._local, 'document', None)
+        self._local.document = name
+        try:
+            yield
+        finally:
+            self._local.document = previous
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a stage of the current document.
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        # [nested wall, nested cpu] spent in child stages
+        children = [0.0, 0.0]
+        stack.append(children)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            stack.pop()
+            if stack:
+                stack[-1][0] += wall
+                stack[-1][1] += cpu
+            self.record(name, wall - children[0], cpu - children[1])
+
+    def record(self, stage, wall_s, cpu_s, document=None, calls=1):
+        """
+        Add a measurement, e.g. one taken in another process.
+        """
+        if document is None:
+            document = getattr(self._local, 'document', None) or '(global)'
+        with self._lock:
+            stats = self._documents.setdefault(document, {}).setdefault(stage, [0, 0.0, 0.0])
+            stats[0] += calls
+            stats[1] += wall_s
+            stats[2] += cpu_s
+
+    def document_stages(self, document):
+        """
+        Stage timings of one document, in the report format.
+        """
+        with self._lock:
+            stages = self._documents.get(document, {})
+            return {stage: self._format(stats) for stage, stats in stages.items()}
+
+    def merge(self, document, stages):
+        """
+        Merge stage timings produced by document_stages(), typically returned by a worker process.
+        """
+        for stage, stats in stages.items():
+            self.record(stage, stats["wall_s"], stats["cpu_s"], document=document, calls=stats["calls"])
+
+    @staticmethod
+    def _format(stats):
+        calls, wall, cpu = stats
+        return {"calls": calls, "wall_s": round(wall, 6), "cpu_s": round(cpu, 6)}
+
+    def report(self):
+        """
+        Per-document and aggregated stage timings, plus profiling data when enabled.
+        """
+        with self._lock:
+            documents = {
+                document: {stage: self._format(stats) for stage, stats in stages.items()}
+                for document, stages in self._documents.items()
+            }
+            totals = {}
+            for stages in self._documents.values():
+                for stage, (calls, wall, cpu) in stages.items():
+                    total = totals.setdefault(stage, [0, 0.0, 0.0])
+                    total[0] += calls
+                    total[1] += wall
+                    total[2] += cpu
+
+        report = {
+            "elapsed_s": round(time.perf_counter() - self._started, 6),
+            "document_count": len([d for d in documents if d != '(global)']),
+            "stages": {stage: self._format(stats) for stage, stats in sorted(totals.items())},
+            "documents": documents
+        }
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            report["profile"] = self._profile_summary()
+            self._profiler.enable()
+
+        if self._trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:self.top_n]
+            report["memory"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in top
+                ]
+            }
+
+        return report
+
+    def _profile_summary(self):
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": nc,
+                "total_s": round(tt, 6),
+                "cumulative_s": round(ct, 6)
+            })
+        rows.sort(key=lambda row: row["cumulative_s"], reverse=True)
+        return rows[:self.top_n]
+
+    def write_report(self, path):
+        """
+        Write the report as JSON and return it.
+        """
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def close(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+        if self._trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+@contextmanager
+def null_stage(name=None):
+    yield
+
+def stage(instrumentation, name):
+    """
+    Stage context for optional instrumentation: a no-op when it is None.
+    """
+    if instrumentation is None:
+        return null_stage()
+    return instrumentation.stage(name)
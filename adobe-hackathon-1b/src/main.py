@@ -1,14 +1,106 @@
+import time
+# Taken before the imports below, so the cold-start time reported at the end includes them
+START_TIME = time.perf_counter()
+
 import os
+import re
 import json
 import argparse
-import time
 from pdf_processor import PDFProcessor
+from instrumentation import Instrumentation
+from embedding_store import DEFAULT_MAX_ENTRIES
+from output_writer import JsonLinesWriter
+
+IMPORT_TIME = time.perf_counter() - START_TIME
+
+def collection_state(scenario_file, input_dir):
+    """The scenario and the size and modification time of its file and of each of its documents
+    (None for a missing document); (None, None) if the scenario cannot be read"""
+    try:
+        with open(scenario_file, 'r', encoding='utf-8') as f:
+            scenario = json.load(f)
+        stat = os.stat(scenario_file)
+    except (OSError, ValueError):
+        return None, None
+    state = {scenario_file: (stat.st_size, stat.st_mtime)}
+    for doc in scenario.get("document_collection", []):
+        file_path = os.path.join(input_dir, doc["file_name"])
+        try:
+            stat = os.stat(file_path)
+            state[file_path] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            state[file_path] = None
+    return scenario, state
+
+def watch_collection(processor, scenario_file, input_dir, output_path, interval):
+    """Poll the scenario file and its documents and run the scenario again whenever one of them
+    changes; with the section index, each run only parses the new or changed PDFs"""
+    print(f"Watching {input_dir} every {interval:g}s, press Ctrl+C to stop")
+    _, last_state = collection_state(scenario_file, input_dir)
+    try:
+        while True:
+            time.sleep(interval)
+            scenario, state = collection_state(scenario_file, input_dir)
+            if scenario is None or state == last_state:
+                continue
+            # Files modified within the last interval may still be being copied in
+            if any(entry is not None and time.time() - entry[1] < interval for entry in state.values()):
+                continue
+            last_state = state
+            try:
+                _, processing_time = processor.process_documents(scenario, input_dir, output_path)
+                print(f"Output updated: {output_path} ({processing_time:.2f} seconds)")
+            except Exception as e:
+                print(f"Error processing documents: {str(e)}")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+def scenario_dir_name(name, index, used):
+    """Safe output directory name for a scenario: a single path component, suffixed when already used"""
+    name = re.sub(r'[^\w.\- ]+', '_', os.path.basename(str(name).replace('\\', '/'))).strip(' .')
+    if not name:
+        name = f"scenario_{index:02d}"
+    unique = name
+    suffix = 2
+    while unique.lower() in used:
+        unique = f"{name}_{suffix}"
+        suffix += 1
+    if unique != name:
+        print(f"Warning: scenario name {name!r} is used more than once, writing scenario {index} to {unique!r}")
+    used.add(unique.lower())
+    return unique
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Persona-Driven Document Intelligence')
     parser.add_argument('--test_case', type=str, required=True, help='Test case directory name')
+    parser.add_argument('--scenarios', type=str, default=None, help='JSON list of scenarios (persona, job_to_be_done, optional name and document_collection) to run over the test case documents in one batch')
+    parser.add_argument('--backend', type=str, default='auto', choices=['auto', 'pymupdf', 'pdfplumber', 'outline'], help='PDF text extraction backend; outline splits sections at the Round 1A headings')
+    parser.add_argument('--outline_dir', type=str, default=None, help='Also write the Round 1A outline JSON of each document here, from the same parse (implies --backend outline)')
+    parser.add_argument('--max_pages', type=int, default=None, help='Only read the first N pages of each document (default: all)')
+    parser.add_argument('--cache_dir', type=str, default=None, help='Directory for the persistent embedding store (default: no store)')
+    parser.add_argument('--cache_max_entries', type=int, default=DEFAULT_MAX_ENTRIES, help='Maximum number of embeddings kept in the store')
+    parser.add_argument('--index_dir', type=str, default=None, help='Persistent section index; unchanged documents are not parsed again')
+    parser.add_argument('--index_kind', type=str, default='auto', choices=['auto', 'exact', 'ivf', 'hnsw'], help='Vector search used by the section index')
+    parser.add_argument('--encoder', type=str, default='torch', choices=['torch', 'torch-int8', 'onnx', 'onnx-int8'], help='Sentence encoder: fp32 PyTorch, int8 PyTorch or ONNX Runtime (exported on first use)')
+    parser.add_argument('--subsection_sections', type=int, default=3, help='Number of top-ranked sections (at most 10) analysed for refined subsection text')
+    parser.add_argument('--subsection_max_chunks', type=int, default=30, help='Sentence-window chunks embedded for subsection analysis, shared by all analysed sections in one batch')
+    parser.add_argument('--compact', action='store_true', help='Write the output JSON on a single line instead of indented')
+    parser.add_argument('--jsonl', type=str, default=None, help='Stream every output to this JSON Lines file, one record per scenario as soon as it is ranked, instead of writing JSON files')
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS', help='After the first run, poll the scenario and its documents every SECONDS and run again when they change (requires --index_dir)')
+    parser.add_argument('--report', type=str, default=None, help='Write a JSON per-stage timing report to this path')
+    parser.add_argument('--profile', action='store_true', help='Include a cProfile summary in the timing report')
+    parser.add_argument('--trace-memory', action='store_true', help='Include tracemalloc peak memory in the timing report')
     args = parser.parse_args()
+    if args.outline_dir:
+        if args.backend not in ('auto', 'outline'):
+            parser.error("--outline_dir requires the outline backend")
+        args.backend = 'outline'
+    if args.watch is not None:
+        if not args.index_dir:
+            parser.error("--watch requires --index_dir, so that unchanged documents are not parsed again")
+        if args.scenarios or args.jsonl:
+            parser.error("--watch runs a single scenario and writes its output file (no --scenarios or --jsonl)")
     
     # Set up paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -39,13 +131,45 @@ def main():
     # Set output path
     output_path = os.path.join(output_dir, 'challenge1b_output.json')
     
+    # Batch mode: every scenario gets its own output directory; without a document_collection it
+    # uses the test case's documents
+    batch = []
+    if args.scenarios:
+        try:
+            with open(args.scenarios, 'r', encoding='utf-8') as f:
+                scenarios = json.load(f)
+        except Exception as e:
+            print(f"Error loading scenarios: {str(e)}")
+            return
+        used_names = set()
+        for i, scenario in enumerate(scenarios, 1):
+            scenario = {"document_collection": input_scenario["document_collection"], **scenario}
+            # Names become directory names under output_dir, so they are reduced to one safe component
+            scenario_dir = os.path.join(output_dir, scenario_dir_name(scenario.pop("name", ""), i, used_names))
+            if not args.jsonl:
+                os.makedirs(scenario_dir, exist_ok=True)
+            batch.append((scenario, input_dir, os.path.join(scenario_dir, 'challenge1b_output.json')))
+    
     # Initialize PDF processor with optimized settings
     model_path = os.path.join(base_dir, 'models', 'all-MiniLM-L6-v2')
     import multiprocessing
+    instrumentation = Instrumentation(profile=args.profile, trace_memory=args.trace_memory)
     processor = PDFProcessor(
         model_path=model_path,
-        max_workers=min(multiprocessing.cpu_count() + 2, 12),  # Use more workers for better parallelism
-        batch_size=16  # Smaller batch size for faster processing
+        max_workers=multiprocessing.cpu_count(),  # One document parsing process per core
+        instrumentation=instrumentation,
+        backend=args.backend,
+        max_pages=args.max_pages,
+        cache_dir=args.cache_dir,
+        cache_max_entries=args.cache_max_entries,
+        index_dir=args.index_dir,
+        index_kind=args.index_kind,
+        encoder=args.encoder,
+        outline_dir=args.outline_dir,
+        compact_output=args.compact,
+        subsection_sections=args.subsection_sections,
+        subsection_max_chunks=args.subsection_max_chunks,
+        jsonl_writer=JsonLinesWriter(args.jsonl) if args.jsonl else None
     )
     
     # Process documents
@@ -53,12 +177,35 @@ def main():
     start_time = time.time()
     
     try:
-        output, processing_time = processor.process_documents(input_scenario, input_dir, output_path)
-        print(f"Output saved to: {output_path}")
+        if batch:
+            outputs, processing_time = processor.process_scenarios(batch)
+        else:
+            output, processing_time = processor.process_documents(input_scenario, input_dir, output_path)
+            if not args.jsonl:
+                print(f"Output saved to: {output_path}")
+        if args.jsonl:
+            processor.jsonl_writer.close()
+            print(f"{processor.jsonl_writer.count} output record(s) saved to: {args.jsonl}")
+        if args.outline_dir:
+            print(f"Outlines saved to: {args.outline_dir}")
         print(f"Total processing time: {processing_time:.2f} seconds")
     except Exception as e:
         print(f"Error processing documents: {str(e)}")
         return
+    
+    # Per-stage timing breakdown
+    report = instrumentation.write_report(args.report) if args.report else instrumentation.report()
+    instrumentation.close()
+    for name, stats in report["stages"].items():
+        print(f"  {name:<20} {stats['wall_s']:8.2f}s wall {stats['cpu_s']:8.2f}s CPU  ({stats['calls']} calls)")
+    model_load = report["stages"].get("model_load", {}).get("wall_s", 0.0)
+    print(f"Cold start: imports {IMPORT_TIME:.2f}s, model load {model_load:.2f}s, "
+          f"output written {time.perf_counter() - START_TIME:.2f}s after start")
+    if args.report:
+        print(f"Timing report saved to: {args.report}")
+    
+    if args.watch is not None:
+        watch_collection(processor, scenario_file, input_dir, output_path, args.watch)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
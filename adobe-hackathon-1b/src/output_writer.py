@@ -0,0 +1,92 @@
+"""
+JSON output shared by Round 1A and Round 1B: serialization (orjson when it
+is installed), atomic file writes and a streaming JSON Lines writer.
+
+adobe-hackathon-1a/src/output_writer.py and adobe-hackathon-1b/src/output_writer.py
+are kept as byte-identical copies, like instrumentation.py. Each round
+is built into its own container from its own directory (see the
+Dockerfiles), so 1B cannot import 1A's copy at run time. Edit both
+copies together; adobe-hackathon-1b/tests/test_shared_modules.py fails
+when they differ.
+"""
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_json(data, compact=False):
+    """
+    Serialize data to UTF-8 JSON bytes, indented by two spaces or, with
+    compact, on a single line. orjson is used when it is installed; its
+    output is the same as the json module's, only faster.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+def write_atomic(path, content):
+    """
+    Write bytes to a temporary file next to path and rename it into place,
+    so a reader never sees a partially written file.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json(data, path, compact=False):
+    """
+    Write data as JSON to path, atomically.
+    """
+    write_atomic(path, dumps_json(data, compact))
+
+class JsonLinesWriter:
+    """
+    Stream records to a JSON Lines file, one compact line per record,
+    flushed as soon as it is written so consumers can follow the file while
+    a run is still going. Lines go to <path>.partial, which is renamed to
+    path when the writer is closed: a file at path is always complete.
+    After an error the .partial file is left behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.count = 0
+        self._file = open(self.partial_path, 'wb')
+
+    def write(self, record):
+        self._file.write(dumps_json(record, compact=True) + b"\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        """
+        Finish the file and move it into place.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.partial_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            # Leave the .partial file behind rather than pass it off as complete
+            self._file.close()
+            self._file = None
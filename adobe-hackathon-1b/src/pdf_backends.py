@@ -0,0 +1,172 @@
+import io
+import os
+import sys
+import mmap
+import importlib.util
+from collections import Counter
+from instrumentation import stage
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Round 1A checkout whose outline extractor the outline backend runs
+OUTLINE_EXTRACTOR_DIR = os.environ.get(
+    'OUTLINE_EXTRACTOR_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.pardir, 'adobe-hackathon-1a'))
+
+# Module name the Round 1A package is loaded under; its own name, src, is also the name of this directory
+OUTLINE_PACKAGE = 'round1a_outline'
+
+def _import_outline_extractor():
+    # Imported on demand: only the outline backend needs the Round 1A package. It is loaded from its file
+    # location under a name of its own, so it cannot clash with (or be shadowed by) any other src package
+    path = os.path.abspath(OUTLINE_EXTRACTOR_DIR)
+    package_dir = os.path.join(path, 'src')
+    if not os.path.isfile(os.path.join(package_dir, 'extractor.py')):
+        source = "OUTLINE_EXTRACTOR_DIR" if 'OUTLINE_EXTRACTOR_DIR' in os.environ else "the sibling checkout"
+        raise ImportError(f"The outline backend requires the Round 1A extractor, but {source} ({path}) "
+                          f"has no src/extractor.py (set OUTLINE_EXTRACTOR_DIR to an adobe-hackathon-1a checkout)")
+    if OUTLINE_PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(OUTLINE_PACKAGE, os.path.join(package_dir, '__init__.py'),
+                                                      submodule_search_locations=[package_dir])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[OUTLINE_PACKAGE] = package
+        try:
+            spec.loader.exec_module(package)
+        except BaseException:
+            del sys.modules[OUTLINE_PACKAGE]
+            raise
+    return importlib.import_module(f"{OUTLINE_PACKAGE}.extractor").DocumentExtractor
+
+class PDFBackend:
+    """Text extraction backend: yields each page as a list of (text, font_size, bold) lines"""
+    name = None
+
+    def iter_pages(self, pdf_source, instrumentation=None, max_pages=None):
+        """Yield (page_num, lines) for the first max_pages pages (all pages if None)"""
+        raise NotImplementedError
+
+class PdfplumberBackend(PDFBackend):
+    """pdfplumber/pdfminer text extraction; lines carry no font information (size and bold are None)"""
+    name = 'pdfplumber'
+
+    @staticmethod
+    def _open_source(pdf_source):
+        """Turn a path or in-memory PDF (bytes, bytearray, memoryview, mmap, BytesIO) into something pdfplumber can open"""
+        if isinstance(pdf_source, (str, os.PathLike, io.BytesIO, mmap.mmap)):
+            # Paths are opened by pdfplumber; BytesIO and mmap are already seekable files
+            return pdf_source
+        if isinstance(pdf_source, bytes):
+            # BytesIO shares the bytes object until it is written to, so this does not copy
+            return io.BytesIO(pdf_source)
+        if isinstance(pdf_source, (bytearray, memoryview)):
+            # pdfminer needs a file object; a mutable buffer has to be copied into one
+            return io.BytesIO(pdf_source)
+        raise TypeError(f"Unsupported PDF source: {type(pdf_source).__name__}")
+
+    def iter_pages(self, pdf_source, instrumentation=None, max_pages=None):
+        # Imported on first use: pdfminer is slow to import and only needed by this fallback backend
+        import pdfplumber
+        with stage(instrumentation, "open"):
+            pdf = pdfplumber.open(self._open_source(pdf_source))
+        with pdf:
+            for page_num, page in enumerate(pdf.pages[:max_pages], 1):
+                with stage(instrumentation, "text_extraction"):
+                    text = page.extract_text()
+                lines = [(line, None, None) for line in text.split('\n')] if text else []
+                yield page_num, lines
+
+class PyMuPDFBackend(PDFBackend):
+    """PyMuPDF span-level extraction; each line carries its largest font size and whether all of it is bold"""
+    name = 'pymupdf'
+
+    # Image blocks are never used, and skipping them makes get_text("dict") much cheaper
+    TEXT_FLAGS = (fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES) if fitz else 0
+    BOLD_FLAG = 16
+
+    @staticmethod
+    def _open_source(pdf_source):
+        """Open a path or in-memory PDF; buffers are handed to MuPDF without copying"""
+        if isinstance(pdf_source, (str, os.PathLike)):
+            return fitz.open(pdf_source)
+        if isinstance(pdf_source, io.BytesIO):
+            pdf_source = pdf_source.getbuffer()
+        elif isinstance(pdf_source, (bytearray, mmap.mmap)):
+            pdf_source = memoryview(pdf_source)
+        elif not isinstance(pdf_source, (bytes, memoryview)):
+            raise TypeError(f"Unsupported PDF source: {type(pdf_source).__name__}")
+        return fitz.open(stream=pdf_source, filetype="pdf")
+
+    def iter_pages(self, pdf_source, instrumentation=None, max_pages=None):
+        with stage(instrumentation, "open"):
+            doc = self._open_source(pdf_source)
+        with doc:
+            page_count = doc.page_count if max_pages is None else min(max_pages, doc.page_count)
+            for page_num in range(1, page_count + 1):
+                with stage(instrumentation, "text_extraction"):
+                    lines = self._page_lines(doc[page_num - 1])
+                yield page_num, lines
+
+    def _page_lines(self, page):
+        lines = []
+        for block in page.get_text("dict", flags=self.TEXT_FLAGS)["blocks"]:
+            for line in block.get("lines", ()):
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = "".join(span["text"] for span in line["spans"])
+                size = max(span["size"] for span in spans)
+                bold = all(span["flags"] & self.BOLD_FLAG for span in spans)
+                lines.append((text, size, bold))
+        return lines
+
+class OutlineBackend(PDFBackend):
+    """PyMuPDF through the Round 1A outline extractor: a single parse gives the page lines, the 1A title and
+    outline, and sections split at the 1A headings (see parse)"""
+    name = 'outline'
+
+    def __init__(self):
+        self.extractor_class = _import_outline_extractor()
+
+    def parse(self, pdf_source, instrumentation=None, max_pages=None):
+        """Parse a PDF once into a Round 1A DocumentModel (span tables, title, outline and heading positions)"""
+        # max_pages means only those pages are read, so heading levels come from them too
+        extractor = self.extractor_class(page_range=(1, max_pages) if max_pages else None,
+                                         local_levels=bool(max_pages))
+        extractor.instrumentation = instrumentation
+        return extractor.extract_document_model(pdf_source)
+
+    def iter_pages(self, pdf_source, instrumentation=None, max_pages=None):
+        for spans in self.parse(pdf_source, instrumentation, max_pages).pages:
+            yield spans.page_num + 1, [(text, size, bool(bold))
+                                       for text, size, bold in zip(spans.texts, spans.sizes, spans.bold)]
+
+BACKENDS = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    PyMuPDFBackend.name: PyMuPDFBackend,
+    OutlineBackend.name: OutlineBackend,
+}
+
+def get_backend(name='auto'):
+    """Return a backend instance by name; 'auto' prefers PyMuPDF and falls back to pdfplumber"""
+    if name == 'auto':
+        name = PyMuPDFBackend.name if fitz is not None else PdfplumberBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name} (choose from {', '.join(BACKENDS)} or auto)")
+    if name in (PyMuPDFBackend.name, OutlineBackend.name) and fitz is None:
+        raise ImportError(f"The {name} backend requires PyMuPDF (pip install PyMuPDF)")
+    if name == PdfplumberBackend.name and importlib.util.find_spec('pdfplumber') is None:
+        raise ImportError("The pdfplumber backend requires pdfplumber (pip install pdfplumber)")
+    return BACKENDS[name]()
+
+def body_font_size(lines):
+    """Most common font size of the given lines weighted by characters, or None without font information"""
+    sizes = Counter()
+    for text, size, _ in lines:
+        if size is not None:
+            sizes[round(size, 1)] += len(text)
+    if not sizes:
+        return None
+    return sizes.most_common(1)[0][0]
@@ -1,308 +1,353 @@
 import os
-import json
 import time
-import re
-import pdfplumber
+import heapq
 import numpy as np
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import concurrent.futures
-from functools import lru_cache
 import multiprocessing
+from instrumentation import Instrumentation, stage
+from pdf_backends import get_backend
+from document_parser import parse_document, iter_parsed_documents
+from embedding_store import EmbeddingStore, EmbeddingLRUCache, DEFAULT_MAX_ENTRIES
+from section_index import SectionIndex, top_k_indices
+from encoders import load_encoder, read_model_config
+from output_writer import write_json
+from sections import sentence_windows
+
+# Characters of a section's text embedded with its title for ranking
+SECTION_EMBED_CHARS = 500
 
 class PDFProcessor:
-    def __init__(self, model_path='models/all-MiniLM-L6-v2', max_workers=None, batch_size=32):
-        # Load the sentence transformer model
-        self.model = SentenceTransformer(model_path)
+    def __init__(self, model_path='models/all-MiniLM-L6-v2', max_workers=None, batch_size=64, instrumentation=None,
+                 backend='auto', max_pages=None, max_batch_tokens=8192, cache_dir=None,
+                 cache_max_entries=DEFAULT_MAX_ENTRIES, query_cache_size=256, index_dir=None, index_kind='auto',
+                 encoder='torch', outline_dir=None, compact_output=False, jsonl_writer=None,
+                 subsection_sections=3, subsection_max_chunks=30):
+        # Per-stage timings (wall and CPU time per document and in aggregate)
+        self.instrumentation = instrumentation if instrumentation else Instrumentation()
+        # Text extraction backend ('pymupdf', 'pdfplumber', 'outline' or 'auto') and optional page limit per document
+        self.backend = get_backend(backend)
+        self.max_pages = max_pages
+        # With the outline backend, the Round 1A outline JSON of every parsed document can be written here too
+        if outline_dir and self.backend.name != 'outline':
+            raise ValueError("Writing outlines requires the outline backend")
+        self.outline_dir = outline_dir
+        if outline_dir:
+            os.makedirs(outline_dir, exist_ok=True)
+        # Sentence encoder: fp32 PyTorch, int8 PyTorch or ONNX Runtime (see encoders.py). It is loaded on
+        # first use, or by process_documents while the documents are being parsed
+        self.model_path = model_path
+        self.encoder = encoder
+        self._model = None
+        self.embedding_dim = read_model_config(model_path)[3] or self.model.get_sentence_embedding_dimension()
+        # Cached embeddings and indexes are only reused with the model and encoder that computed them
+        self.model_id = os.path.basename(os.path.normpath(model_path))
+        if encoder != 'torch':
+            self.model_id += f"-{encoder}"
         # Set the number of workers for parallel processing
         self.max_workers = max_workers if max_workers else max(1, multiprocessing.cpu_count() - 1)
-        # Cache for embeddings
-        self.embedding_cache = {}
-        # Set batch size for encoding
+        # Query embeddings of this processor, in a bounded LRU cache
+        self.query_cache = EmbeddingLRUCache(query_cache_size)
+        # Persistent embedding store shared across runs and processes (None: no caching between calls)
+        self.embedding_store = None
+        if cache_dir:
+            self.embedding_store = EmbeddingStore(cache_dir, self.model_id, self.embedding_dim, cache_max_entries)
+        # Persistent section index; with it, unchanged documents are ranked without being parsed again
+        self.index_dir = index_dir
+        self.index_kind = index_kind
+        # Output JSON files are written atomically, indented unless compact_output; with a JsonLinesWriter,
+        # each output is streamed to it as one record instead, as soon as it is built
+        self.compact_output = compact_output
+        self.jsonl_writer = jsonl_writer
+        # Subsection analysis covers the top subsection_sections sections (up to the 10 ranked ones); their
+        # chunks are embedded in one batch of at most subsection_max_chunks, whatever the number of sections
+        self.subsection_sections = subsection_sections
+        self.subsection_max_chunks = subsection_max_chunks
+        # Encoding batches hold at most batch_size texts and max_batch_tokens tokens including padding
         self.batch_size = batch_size
-        print(f"Initialized PDFProcessor with {self.max_workers} workers and batch size {self.batch_size}")
-        
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF with page numbers and section titles - optimized version"""
-        sections = []
-        all_text = ""
-        
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                current_section = {"title": "Introduction", "text": "", "page": 1}
-                
-                # Process only the first 15 pages or all pages if less than 15 for better efficiency
-                max_pages = min(15, len(pdf.pages))
-                
-                for page_num, page in enumerate(pdf.pages[:max_pages], 1):
-                    text = page.extract_text()
-                    if not text or len(text.strip()) < 10:  # Skip nearly empty pages
-                        continue
-                        
-                    # Add to all text
-                    all_text += text + "\n"
-                    
-                    # Look for section headers (usually in bold or larger font)
-                    lines = text.split('\n')
-                    for line in lines:
-                        # Optimized heuristic for section headers
-                        stripped_line = line.strip()
-                        # Skip very long lines immediately
-                        if len(stripped_line) >= 80:  # Reduced from 100 to 80 for better header detection
-                            current_section["text"] += line + "\n"
-                            continue
-                            
-                        # Enhanced header detection
-                        if ((not stripped_line.endswith('.') and
-                            len(stripped_line.split()) <= 8 and  # Reduced from 10 to 8
-                            any(word[0].isupper() for word in stripped_line.split() if word)) or
-                            (stripped_line.endswith(':')) or
-                            (stripped_line[0].isdigit() and '.' in stripped_line[:5])):
-                            
-                            # Save previous section if it has content
-                            if current_section["text"].strip():
-                                sections.append(current_section)
-                            
-                            # Start new section
-                            current_section = {"title": stripped_line, "text": "", "page": page_num}
-                        else:
-                            current_section["text"] += line + "\n"
-                
-                # Add the last section
-                if current_section["text"].strip():
-                    sections.append(current_section)
-        
-        except Exception as e:
-            print(f"Error processing {pdf_path}: {str(e)}")
-            return [], ""
-        
-        return sections, all_text
+        self.max_batch_tokens = max_batch_tokens
+        print(f"Initialized PDFProcessor with {self.max_workers} workers, batch size {self.batch_size}, "
+              f"the {self.backend.name} backend and the {self.encoder} encoder")
+        
+    @property
+    def model(self):
+        """The sentence encoder, loaded on first access"""
+        if self._model is None:
+            self.load_model()
+        return self._model
+        
+    def load_model(self):
+        """Load and warm up the sentence encoder unless it is loaded already"""
+        if self._model is not None:
+            return
+        with stage(self.instrumentation, "model_load"):
+            model = load_encoder(self.model_path, self.encoder)
+            # The first encode call initialises the inference kernels; pay for it here rather than in ranking
+            model.encode(["warm-up"], show_progress_bar=False)
+        self._model = model
+        
+    def clear_caches(self):
+        """Drop in-memory cached embeddings so the next run starts cold (used by the benchmark); the store persists"""
+        self.query_cache.clear()
+        
+    def extract_text_from_pdf(self, pdf_path, with_all_text=False):
+        """Extract text from PDF with page numbers and section titles - optimized version
+        
+        pdf_path can be a file path or the PDF itself as bytes, bytearray,
+        memoryview, mmap or BytesIO, so documents received in memory need no temp file.
+        Returns (sections, all_text); the full text is only assembled with with_all_text.
+        """
+        return parse_document(pdf_path, self.backend, self.max_pages, self.instrumentation,
+                              with_all_text=with_all_text)
+    
+    @staticmethod
+    def _build_query(persona, job_focus):
+        """Create a query based on persona and job focus"""
+        query = f"{persona['role']} with expertise in {persona['expertise']} needs to {job_focus['task']} "
+        query += f"focusing on {', '.join(job_focus['focus'])}"
+        return query
+    
+    def _get_embedding(self, text):
+        """Get embedding for a single text (the query) through the processor's bounded LRU cache"""
+        embedding = self.query_cache.get(text)
+        if embedding is None:
+            with stage(self.instrumentation, "embedding"):
+                embedding = self.model.encode([text], show_progress_bar=False)[0]
+            self.query_cache.put(text, embedding)
+        return embedding
     
-    @lru_cache(maxsize=256)
-    def _get_embedding(self, text_key):
-        """Get embedding for text with function-level caching"""
-        # This method is optimized for single text embedding with lru_cache
-        # text_key should be a hashable representation of the text
-        return self.model.encode([text_key])[0]
+    def _get_query_embeddings(self, queries):
+        """Embeddings of many queries: cached ones from the LRU cache, the others encoded in one batch"""
+        embeddings = {query: self.query_cache.get(query) for query in dict.fromkeys(queries)}
+        missing = [query for query, embedding in embeddings.items() if embedding is None]
+        if missing:
+            for query, embedding in zip(missing, self._get_embeddings_batch(missing)):
+                self.query_cache.put(query, embedding)
+                embeddings[query] = embedding
+        return [embeddings[query] for query in queries]
+    
+    def _plan_batches(self, texts):
+        """Group texts of similar token length into batches of at most max_batch_tokens padded tokens"""
+        with stage(self.instrumentation, "tokenization"):
+            lengths = [len(ids) for ids in self.model.tokenizer(
+                texts, truncation=True, max_length=self.model.max_seq_length)["input_ids"]]
+        
+        # Longest first, so each batch is padded to the length of its first text
+        order = sorted(range(len(texts)), key=lambda i: lengths[i], reverse=True)
+        batches = []
+        batch = []
+        for i in order:
+            if batch and (len(batch) >= self.batch_size or
+                          (len(batch) + 1) * lengths[batch[0]] > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
     
     def _get_embeddings_batch(self, texts):
-        """Get embeddings for multiple texts with optimized batching and caching"""
-        # Use a more efficient approach for batch processing
-        all_embeddings = [None] * len(texts)
-        texts_to_encode = []
-        indices_to_encode = []
-        
-        # First pass: check cache and prepare texts that need encoding
-        for i, text in enumerate(texts):
-            # Use a more reliable hash method for text
-            text_key = text[:100]  # Use first 100 chars as key to avoid hash collisions
-            
-            if text_key in self.embedding_cache:
-                all_embeddings[i] = self.embedding_cache[text_key]
-            else:
-                texts_to_encode.append(text)
-                indices_to_encode.append(i)
-        
-        # Second pass: encode new texts in optimized batches
+        """Get embeddings for multiple texts with length-sorted adaptive batching and the persistent store"""
+        # First pass: look up the distinct texts in the store
+        distinct_texts = list(dict.fromkeys(texts))
+        embeddings = {}
+        if self.embedding_store is not None:
+            with stage(self.instrumentation, "embedding_store"):
+                stored = self.embedding_store.get_many(distinct_texts)
+            embeddings = {text: vector for text, vector in zip(distinct_texts, stored) if vector is not None}
+        texts_to_encode = [text for text in distinct_texts if text not in embeddings]
+        
+        # Second pass: encode texts of similar length together so little time is spent on padding
         if texts_to_encode:
-            # Use smaller batches for better memory efficiency
-            optimal_batch_size = min(self.batch_size, 16)  # Smaller batches process faster
-            
-            for i in range(0, len(texts_to_encode), optimal_batch_size):
-                batch = texts_to_encode[i:i+optimal_batch_size]
-                batch_indices = indices_to_encode[i:i+optimal_batch_size]
+            for batch in self._plan_batches(texts_to_encode):
+                batch_texts = [texts_to_encode[j] for j in batch]
                 
                 # Encode the batch with show_progress_bar=False for speed
-                batch_embeddings = self.model.encode(batch, show_progress_bar=False)
-                
-                # Update cache and result array
-                for j, embedding in enumerate(batch_embeddings):
-                    idx = batch_indices[j]
-                    text_key = texts[idx][:100]  # Consistent key generation
-                    
-                    all_embeddings[idx] = embedding
-                    self.embedding_cache[text_key] = embedding
-        
-        return all_embeddings
+                with stage(self.instrumentation, "embedding"):
+                    batch_embeddings = self.model.encode(batch_texts, batch_size=len(batch_texts),
+                                                         show_progress_bar=False)
+                embeddings.update(zip(batch_texts, batch_embeddings))
+            
+            if self.embedding_store is not None:
+                with stage(self.instrumentation, "embedding_store"):
+                    self.embedding_store.put_many(texts_to_encode, [embeddings[text] for text in texts_to_encode])
+        
+        return [embeddings[text] for text in texts]
+    
+    @staticmethod
+    def _section_text(section):
+        """Text that represents a section when it is embedded"""
+        return f"{section.title}. {section.text_prefix(SECTION_EMBED_CHARS)}"
     
-    def rank_sections(self, sections, persona, job_focus):
-        """Rank sections based on relevance to persona and job focus - optimized version"""
+    def rank_sections(self, sections, persona, job_focus, section_embeddings=None, query_embedding=None, top_k=None):
+        """Rank sections based on relevance to persona and job focus - optimized version
+        
+        section_embeddings and query_embedding can be passed in when they were computed once for a whole scenario.
+        With top_k, only the top_k best sections are selected (argpartition) and returned.
+        """
         if not sections:
             return []
         
-        # Create a query based on persona and job focus
-        query = f"{persona['role']} with expertise in {persona['expertise']} needs to {job_focus['task']} "
-        query += f"focusing on {', '.join(job_focus['focus'])}"
-        
         # Get embedding for query
-        query_embedding = self._get_embedding(query)
+        if query_embedding is None:
+            query_embedding = self._get_embedding(self._build_query(persona, job_focus))
         
         # Prepare section texts for batch processing
-        section_texts = [f"{section['title']}. {section['text'][:500]}" for section in sections]
-        section_embeddings = self._get_embeddings_batch(section_texts)
-        
-        # Calculate similarities in one batch operation
-        similarities = cosine_similarity([query_embedding], section_embeddings)[0]
-        
-        # Create ranked sections
-        ranked_sections = []
-        for i, (section, similarity) in enumerate(zip(sections, similarities)):
-            ranked_sections.append({
-                "section": section,
-                "score": float(similarity),
-                "index": i
-            })
+        if section_embeddings is None:
+            section_embeddings = self._get_embeddings_batch([self._section_text(section) for section in sections])
         
-        # Sort by similarity score in descending order
-        ranked_sections.sort(key=lambda x: x["score"], reverse=True)
+        with stage(self.instrumentation, "similarity"):
+            # Cosine similarity as one matrix-vector product of normalised embeddings
+            similarities = SectionIndex.normalize(section_embeddings) @ SectionIndex.normalize([query_embedding])[0]
+            
+            # Select the best sections without sorting all of them; dicts are only built for those
+            top = top_k_indices(similarities, len(sections) if top_k is None else top_k)
+            ranked_sections = [{
+                "section": sections[i],
+                "score": float(similarities[i]),
+                "index": int(i)
+            } for i in top]
         
         return ranked_sections
     
-    def analyze_subsections(self, section_text, persona, job_focus):
-        """Break down section text into smaller chunks and analyze relevance - optimized version"""
-        # Split text into paragraphs
-        paragraphs = re.split(r'\n\s*\n', section_text)
-        
-        # Filter out very short paragraphs and limit to 10 paragraphs for efficiency
-        paragraphs = [p for p in paragraphs if len(p.split()) > 10][:10]
-        
-        if not paragraphs:
-            return []
-        
-        # Create a query based on persona and job focus
-        query = f"{persona['role']} with expertise in {persona['expertise']} needs to {job_focus['task']} "
-        query += f"focusing on {', '.join(job_focus['focus'])}"
-        
-        # Get embeddings using optimized batch method
-        query_embedding = self._get_embedding(query)
-        paragraph_embeddings = self._get_embeddings_batch(paragraphs)
-        
-        # Calculate similarity scores
-        similarities = cosine_similarity([query_embedding], paragraph_embeddings)[0]
+    def analyze_subsections(self, ranked_sections, query_embedding):
+        """The 3 most relevant chunks (similarity > 0.3) of each ranked section, as lists of refined_text dicts
+        
+        Sections are cut into overlapping sentence windows, and the chunks of all sections are embedded in one
+        batch of at most subsection_max_chunks texts, taken round-robin so every section keeps its first chunks.
+        A section that fits in one chunk was embedded whole for ranking, so its ranking score is reused.
+        """
+        section_chunks = [sentence_windows(ranked_section["section"].text) for ranked_section in ranked_sections]
+        reused = {k for k, (ranked_section, chunks) in enumerate(zip(ranked_sections, section_chunks))
+                  if len(chunks) == 1 and len(ranked_section["section"]) <= SECTION_EMBED_CHARS}
+        
+        # Chunks to embed: the first chunk of every section, then the second, and so on until the budget is spent
+        selected = []
+        depth = 0
+        while len(selected) < self.subsection_max_chunks:
+            row = [(k, chunks[depth]) for k, chunks in enumerate(section_chunks)
+                   if k not in reused and depth < len(chunks)]
+            if not row:
+                break
+            selected.extend(row[:self.subsection_max_chunks - len(selected)])
+            depth += 1
+        
+        scored = [[] for _ in ranked_sections]
+        for k in reused:
+            scored[k].append((ranked_sections[k]["score"], section_chunks[k][0]))
+        if selected:
+            chunk_embeddings = self._get_embeddings_batch([chunk for _, chunk in selected])
+            with stage(self.instrumentation, "similarity"):
+                similarities = SectionIndex.normalize(chunk_embeddings) @ SectionIndex.normalize([query_embedding])[0]
+            for (k, chunk), similarity in zip(selected, similarities):
+                scored[k].append((float(similarity), chunk))
         
-        # Create subsection analysis - only process paragraphs with similarity > 0.3
         subsections = []
-        for paragraph, similarity in zip(paragraphs, similarities):
-            if similarity > 0.3:  # Only include relevant paragraphs
-                subsections.append({
-                    "refined_text": paragraph,
-                    "relevance_score": float(similarity)
-                })
-        
-        # Sort by relevance score in descending order
-        subsections.sort(key=lambda x: x["relevance_score"], reverse=True)
-        
-        return subsections[:3]  # Return top 3 most relevant subsections for efficiency
+        for chunks in scored:
+            scores = np.array([score for score, _ in chunks], dtype=np.float32)
+            top = [i for i in top_k_indices(scores, 3) if scores[i] > 0.3]
+            subsections.append([{
+                "refined_text": chunks[i][1],
+                "relevance_score": chunks[i][0]
+            } for i in top])
+        return subsections
     
-    def _process_single_document(self, doc_data):
-        """Process a single document and return its ranked sections"""
-        file_name, file_path, persona, job_to_be_done = doc_data
-        
-        print(f"Processing document: {file_name}")
-        
-        if not os.path.exists(file_path):
-            print(f"Warning: File not found: {file_path}")
-            return None
-            
-        try:
-            # Extract text from PDF
-            sections, _ = self.extract_text_from_pdf(file_path)
-            
-            # Rank sections based on relevance
-            ranked_sections = self.rank_sections(sections, persona, job_to_be_done)
-            
-            # Add document name to each ranked section
-            for ranked_section in ranked_sections:
-                ranked_section["document"] = file_name
-            
-            return {
-                "document": file_name,
-                "ranked_sections": ranked_sections,
-                "success": True
-            }
+    def _parse_documents(self, processing_tasks):
+        """Parse (file_name, file_path) documents in worker processes; returns {file_name: sections}"""
+        # Parsing is CPU-bound and holds the GIL, so it runs in processes rather than threads
+        parsed_sections = {}
+        workers = min(self.max_workers, os.cpu_count() or 1)
+        # The model is loaded (if it is not yet) while the workers parse
+        for file_name, sections, stages in iter_parsed_documents(processing_tasks, self.backend.name, self.max_pages,
+                                                                 workers, self.load_model, self.outline_dir):
+            self.instrumentation.merge(file_name, stages)
+            if sections is not None:
+                parsed_sections[file_name] = sections
+        return parsed_sections
+    
+    def _embed_sections(self, parsed_sections, file_names):
+        """Embed the sections of the given documents, in that order, in one batched stage"""
+        section_texts = [self._section_text(section)
+                         for file_name in file_names for section in parsed_sections[file_name]]
+        return self._get_embeddings_batch(section_texts)
+    
+    def update_section_index(self, processing_tasks):
+        """Load the section index from index_dir and add the documents that are new or changed since"""
+        index = None
+        if SectionIndex.exists(self.index_dir):
+            with self.instrumentation.stage("index_load"):
+                index = SectionIndex.load(self.index_dir, self.index_kind)
+            if index.model_id != self.model_id:
+                print(f"Section index was built with {index.model_id}, rebuilding it for {self.model_id}")
+                index = None
+        if index is None:
+            index = SectionIndex(self.embedding_dim, self.index_kind, model_id=self.model_id)
+        
+        stale = set(index.stale_documents(processing_tasks))
+        stale_tasks = [task for task in processing_tasks if task[0] in stale]
+        if stale_tasks:
+            # Fingerprints are taken before parsing, so a file that changes meanwhile is picked up next time
+            fingerprints = {file_name: SectionIndex.fingerprint(file_path) for file_name, file_path in stale_tasks}
+            parsed_sections = self._parse_documents(stale_tasks)
+            file_names = [file_name for file_name, _ in stale_tasks if file_name in parsed_sections]
+            section_embeddings = self._embed_sections(parsed_sections, file_names)
             
-        except Exception as e:
-            print(f"Error processing {file_name}: {str(e)}")
-            return {
-                "document": file_name,
-                "ranked_sections": [],
-                "success": False
-            }
+            offset = 0
+            for file_name in file_names:
+                sections = parsed_sections[file_name]
+                index.add_document(file_name, fingerprints[file_name], sections,
+                                   section_embeddings[offset:offset + len(sections)])
+                offset += len(sections)
+        if stale_tasks or index.dirty:
+            with self.instrumentation.stage("index_write"):
+                index.save(self.index_dir)
+        
+        print(f"Section index: {len(stale_tasks)} document(s) indexed, "
+              f"{len(processing_tasks) - len(stale_tasks)} reused, {len(index)} sections in total")
+        return index
     
-    def process_documents(self, input_scenario, input_dir, output_path):
-        """Process all documents in parallel and generate the output JSON - optimized version"""
-        start_time = time.time()
-        
-        # Extract information from input scenario
-        document_collection = input_scenario["document_collection"]
-        persona = input_scenario["persona"]
-        job_to_be_done = input_scenario["job_to_be_done"]
-        
-        print(f"Total documents to process: {len(document_collection)}")
-        
-        # Prepare document processing tasks
+    @staticmethod
+    def _collect_tasks(document_collection, input_dir):
+        """(file_name, file_path) of every document of a collection that exists in input_dir"""
         processing_tasks = []
         for doc in document_collection:
             file_name = doc["file_name"]
             file_path = os.path.join(input_dir, file_name)
-            processing_tasks.append((file_name, file_path, persona, job_to_be_done))
-        
-        # Process documents in parallel
-        all_ranked_sections = []
-        document_info = []
-        processed_docs = []
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all tasks
-            future_to_doc = {executor.submit(self._process_single_document, task): task[0] 
-                            for task in processing_tasks}
-            
-            # Process results as they complete
-            for future in concurrent.futures.as_completed(future_to_doc):
-                doc_name = future_to_doc[future]
-                try:
-                    result = future.result()
-                    if result and result["success"]:
-                        processed_docs.append(doc_name)
-                        document_info.append({
-                            "document": doc_name,
-                            "sections": result["ranked_sections"]
-                        })
-                        all_ranked_sections.extend(result["ranked_sections"])
-                except Exception as e:
-                    print(f"Exception processing document {doc_name}: {str(e)}")
-        
-        # Sort all sections by score
-        all_ranked_sections.sort(key=lambda x: x["score"], reverse=True)
-        
+            if not os.path.exists(file_path):
+                print(f"Warning: File not found: {file_path}")
+                continue
+            processing_tasks.append((file_name, file_path))
+        return processing_tasks
+    
+    def _build_output(self, persona, job_to_be_done, processed_docs, all_ranked_sections, query_embedding):
+        """Output JSON of one scenario from its ranked sections (best first)"""
         # Prepare extracted sections for output - limit to top 10
         extracted_sections = []
         for i, ranked_section in enumerate(all_ranked_sections[:10]):
             section = ranked_section["section"]
             extracted_sections.append({
                 "document": ranked_section["document"],
-                "page_number": section["page"],
-                "section_title": section["title"],
+                "page_number": section.page,
+                "section_title": section.title,
                 "importance_rank": i + 1
             })
         
-        # Prepare subsection analysis - limit to top 3 sections for efficiency
+        # Subsection analysis of the top sections, with the chunks of all of them embedded in one batch
+        top_sections = all_ranked_sections[:self.subsection_sections]
+        with self.instrumentation.stage("subsection_analysis"):
+            section_subsections = self.analyze_subsections(top_sections, query_embedding)
+        
         subsection_analysis = []
-        for i, ranked_section in enumerate(all_ranked_sections[:3]):
+        for ranked_section, subsections in zip(top_sections, section_subsections):
             section = ranked_section["section"]
-            subsections = self.analyze_subsections(section["text"], persona, job_to_be_done)
-            
             for subsection in subsections:
                 subsection_analysis.append({
                     "document": ranked_section["document"],
-                    "section_title": section["title"],
+                    "section_title": section.title,
                     "refined_text": subsection["refined_text"],
-                    "page_number": section["page"]
+                    "page_number": section.page
                 })
         
-        # Prepare output JSON
-        output = {
+        return {
             "metadata": {
                 "input_documents": processed_docs,
                 "persona": persona,
@@ -312,6 +357,81 @@ class PDFProcessor:
             "extracted_sections": extracted_sections,
             "subsection_analysis": subsection_analysis
         }
+    
+    def _write_output(self, output, output_path):
+        with self.instrumentation.stage("json_write"):
+            if self.jsonl_writer is not None:
+                self.jsonl_writer.write({"output_path": output_path, **output})
+            else:
+                write_json(output, output_path, self.compact_output)
+    
+    def _print_cache_stats(self):
+        print(f"Query embedding cache: {self.query_cache.stats()}")
+        if self.embedding_store is not None:
+            print(f"Embedding store: {self.embedding_store.stats()}")
+    
+    def process_documents(self, input_scenario, input_dir, output_path):
+        """Process all documents in parallel and generate the output JSON - optimized version
+        
+        PDFs are parsed in worker processes and their sections stream back as each document
+        finishes; all sections of all documents are then embedded in one batched stage.
+        """
+        start_time = time.time()
+        
+        # Extract information from input scenario
+        document_collection = input_scenario["document_collection"]
+        persona = input_scenario["persona"]
+        job_to_be_done = input_scenario["job_to_be_done"]
+        
+        print(f"Total documents to process: {len(document_collection)}")
+        
+        # Prepare document processing tasks
+        processing_tasks = self._collect_tasks(document_collection, input_dir)
+        
+        if self.index_dir:
+            # Only new or changed documents are parsed; the top sections come from an index search
+            index = self.update_section_index(processing_tasks)
+            processed_docs = [file_name for file_name, _ in processing_tasks if file_name in index.documents]
+        else:
+            parsed_sections = self._parse_documents(processing_tasks)
+            
+            # Keep the collection order so the output does not depend on which worker finished first
+            processed_docs = [file_name for file_name, _ in processing_tasks if file_name in parsed_sections]
+            
+            # Embed the sections of all documents in one batched stage
+            section_embeddings = self._embed_sections(parsed_sections, processed_docs)
+        
+        # The query is embedded once per scenario and shared by ranking and subsection analysis; this comes
+        # after parsing, so that parsing is not held up by loading the model
+        query_embedding = self._get_embedding(self._build_query(persona, job_to_be_done))
+        
+        if self.index_dir:
+            with self.instrumentation.stage("similarity"):
+                all_ranked_sections = [{"section": section, "score": score, "document": section.document}
+                                       for score, section in index.search(query_embedding, 10, processed_docs)]
+        else:
+            # Keep each document's 10 best sections; no other section can make the overall top 10
+            document_rankings = []
+            offset = 0
+            for file_name in processed_docs:
+                sections = parsed_sections[file_name]
+                with self.instrumentation.document(file_name):
+                    ranked_sections = self.rank_sections(sections, persona, job_to_be_done,
+                                                         section_embeddings[offset:offset + len(sections)],
+                                                         query_embedding, top_k=10)
+                offset += len(sections)
+                for ranked_section in ranked_sections:
+                    ranked_section["document"] = file_name
+                document_rankings.append(ranked_sections)
+            
+            # Merge the per-document candidates into the overall top 10; nlargest keeps the
+            # collection order between equal scores, like a stable sort would
+            with self.instrumentation.stage("similarity"):
+                all_ranked_sections = heapq.nlargest(
+                    10, (ranked_section for ranked_sections in document_rankings for ranked_section in ranked_sections),
+                    key=lambda x: x["score"])
+        
+        output = self._build_output(persona, job_to_be_done, processed_docs, all_ranked_sections, query_embedding)
         
         print(f"Successfully processed {len(processed_docs)} out of {len(document_collection)} documents")
         if len(processed_docs) < len(document_collection):
@@ -320,9 +440,78 @@ class PDFProcessor:
         # Calculate processing time
         processing_time = time.time() - start_time
         print(f"Processing completed in {processing_time:.2f} seconds")
+        self._print_cache_stats()
         
         # Write output to file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        self._write_output(output, output_path)
+        
+        return output, processing_time
+    
+    def process_scenarios(self, scenarios):
+        """Run many scenarios, parsing and embedding every distinct document only once
         
-        return output, processing_time
\ No newline at end of file
+        scenarios is a list of (input_scenario, input_dir, output_path). All scenario queries are
+        scored against all sections in one matrix product, and each scenario's output JSON is
+        written to its output_path. Returns the outputs and the total processing time.
+        """
+        start_time = time.time()
+        if self.index_dir:
+            print("Note: the section index is not used when processing several scenarios at once")
+        
+        # Documents are shared between scenarios by path
+        scenario_tasks = [self._collect_tasks(input_scenario["document_collection"], input_dir)
+                          for input_scenario, input_dir, _ in scenarios]
+        distinct_paths = list(dict.fromkeys(file_path for tasks in scenario_tasks for _, file_path in tasks))
+        print(f"Processing {len(scenarios)} scenarios over {len(distinct_paths)} distinct documents")
+        
+        parsed_sections = self._parse_documents([(file_path, file_path) for file_path in distinct_paths])
+        parsed_paths = [file_path for file_path in distinct_paths if file_path in parsed_sections]
+        section_embeddings = self._embed_sections(parsed_sections, parsed_paths)
+        
+        # Row of each document's first section in the embedding matrix, and every row's section
+        first_rows = {}
+        row_sections = []
+        for file_path in parsed_paths:
+            first_rows[file_path] = len(row_sections)
+            row_sections.extend(parsed_sections[file_path])
+        
+        # One query per scenario, embedded in one batch and scored against every section at once
+        queries = [self._build_query(input_scenario["persona"], input_scenario["job_to_be_done"])
+                   for input_scenario, _, _ in scenarios]
+        query_embeddings = self._get_query_embeddings(queries)
+        with self.instrumentation.stage("similarity"):
+            if row_sections:
+                scores = SectionIndex.normalize(query_embeddings) @ SectionIndex.normalize(section_embeddings).T
+            else:
+                scores = np.zeros((len(queries), 0), dtype=np.float32)
+        
+        outputs = []
+        for i, ((input_scenario, _, output_path), tasks) in enumerate(zip(scenarios, scenario_tasks)):
+            documents = [(file_name, file_path) for file_name, file_path in tasks if file_path in parsed_sections]
+            processed_docs = [file_name for file_name, _ in documents]
+            with self.instrumentation.stage("similarity"):
+                # The scenario's columns in collection order, so equal scores rank as in process_documents
+                columns = np.array([row for _, file_path in documents
+                                    for row in range(first_rows[file_path],
+                                                     first_rows[file_path] + len(parsed_sections[file_path]))],
+                                   dtype=np.int64)
+                column_documents = [file_name for file_name, file_path in documents
+                                    for _ in parsed_sections[file_path]]
+                top = top_k_indices(scores[i, columns], 10)
+                all_ranked_sections = [{
+                    "section": row_sections[columns[j]],
+                    "score": float(scores[i, columns[j]]),
+                    "document": column_documents[j]
+                } for j in top]
+            
+            output = self._build_output(input_scenario["persona"], input_scenario["job_to_be_done"], processed_docs,
+                                        all_ranked_sections, query_embeddings[i])
+            self._write_output(output, output_path)
+            outputs.append(output)
+            print(f"Scenario {i + 1}/{len(scenarios)}: {len(processed_docs)} documents ranked, "
+                  f"output {'streamed as' if self.jsonl_writer is not None else 'saved to'} {output_path}")
+        
+        processing_time = time.time() - start_time
+        print(f"Processed {len(scenarios)} scenarios in {processing_time:.2f} seconds")
+        self._print_cache_stats()
+        return outputs, processing_time
\ No newline at end of file
@@ -0,0 +1,230 @@
+import os
+import json
+import hashlib
+import numpy as np
+from sections import Section
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's content, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, highest first; equal scores keep their original order"""
+    if k < len(scores):
+        # argpartition picks arbitrarily among scores tied with the k-th, so take those by index
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        candidates = np.sort(np.concatenate([above, ties]))
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class SectionIndex:
+    """Persistent vector index over the section embeddings of a document collection
+
+    Embeddings are stored L2-normalised, so inner product equals cosine similarity. Search
+    is exact (faiss IndexFlatIP, or a NumPy matrix product when faiss is not installed) unless
+    kind is 'ivf' or 'hnsw'; 'auto' switches to IVF once the index holds ivf_threshold sections.
+    The index keeps each section's document, page, title and text plus a fingerprint (size,
+    modification time and content hash) of every indexed PDF, so a collection can be ranked
+    again without re-reading unchanged documents.
+    """
+
+    KINDS = ('auto', 'exact', 'ivf', 'hnsw')
+
+    def __init__(self, dim, kind='auto', ivf_threshold=50000, nprobe=16, model_id=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown index kind: {kind} (choose from {', '.join(self.KINDS)})")
+        self.dim = dim
+        # Embeddings of different models (or quantized encoders) are not comparable
+        self.model_id = model_id
+        self.kind = kind
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.embeddings = np.zeros((0, dim), dtype=np.float32)
+        self.sections = []   # Section record (with its document) per row of embeddings
+        self.documents = {}  # file name -> fingerprint of the indexed PDF
+        self.dirty = False   # Fingerprints refreshed since the index was loaded or saved
+        self._faiss_index = None
+
+    @staticmethod
+    def fingerprint(file_path, digest=True):
+        """Size, modification time and (unless digest is False) content hash of a PDF, used to notice
+        changed documents"""
+        stat = os.stat(file_path)
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if digest:
+            fingerprint["sha256"] = file_digest(file_path)
+        return fingerprint
+
+    @staticmethod
+    def normalize(vectors):
+        """Rows scaled to unit length, as a float32 matrix"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def __len__(self):
+        return len(self.sections)
+
+    def stale_documents(self, documents):
+        """Names of the (file_name, file_path) documents that are not indexed or changed since
+        
+        Only PDFs whose size or modification time differ are read, to compare their content hash;
+        one that was merely touched keeps its sections and gets its fingerprint refreshed.
+        """
+        stale = []
+        for file_name, file_path in documents:
+            indexed = self.documents.get(file_name)
+            current = self.fingerprint(file_path, digest=False)
+            # Indexes written before content hashes were kept have list fingerprints and are re-read once
+            if not isinstance(indexed, dict) or indexed["size"] != current["size"]:
+                stale.append(file_name)
+            elif indexed["mtime_ns"] != current["mtime_ns"]:
+                if indexed.get("sha256") != file_digest(file_path):
+                    stale.append(file_name)
+                else:
+                    indexed["mtime_ns"] = current["mtime_ns"]
+                    self.dirty = True
+        return stale
+
+    def add_document(self, file_name, fingerprint, sections, embeddings):
+        """Index a document's sections, replacing an earlier version of it"""
+        if file_name in self.documents:
+            self.remove_documents([file_name])
+        self.documents[file_name] = fingerprint
+        if sections:
+            self.sections.extend(Section(section.title, section.page, section.buffer, section.start, section.end,
+                                         file_name) for section in sections)
+            self.embeddings = np.vstack([self.embeddings, self.normalize(embeddings)])
+        self._faiss_index = None
+
+    def remove_documents(self, file_names):
+        file_names = set(file_names)
+        keep = [i for i, section in enumerate(self.sections) if section.document not in file_names]
+        self.sections = [self.sections[i] for i in keep]
+        self.embeddings = np.ascontiguousarray(self.embeddings[keep])
+        for file_name in file_names:
+            self.documents.pop(file_name, None)
+        self._faiss_index = None
+
+    def _resolved_kind(self):
+        if self.kind == 'auto':
+            return 'ivf' if len(self) >= self.ivf_threshold else 'exact'
+        return self.kind
+
+    def _build_faiss_index(self):
+        kind = self._resolved_kind()
+        if kind == 'ivf':
+            # Around 4 * sqrt(N) lists, each trained on at least 39 points as faiss recommends
+            nlist = max(1, min(int(4 * np.sqrt(len(self))), len(self) // 39))
+            quantizer = faiss.IndexFlatIP(self.dim)
+            index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(self.embeddings)
+        elif kind == 'hnsw':
+            index = faiss.IndexHNSWFlat(self.dim, 32, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexFlatIP(self.dim)
+        index.add(self.embeddings)
+        return index
+
+    def search(self, query_embedding, k, documents=None):
+        """Return up to k (score, section) pairs by descending cosine similarity,
+        optionally restricted to the given document names"""
+        if not len(self) or k <= 0:
+            return []
+        query = self.normalize([query_embedding])
+
+        rows = None
+        if documents is not None and set(documents) != set(self.documents):
+            documents = set(documents)
+            rows = np.array([i for i, section in enumerate(self.sections) if section.document in documents],
+                            dtype=np.int64)
+            if not len(rows):
+                return []
+        k = min(k, len(self) if rows is None else len(rows))
+
+        if faiss is None:
+            if self._resolved_kind() != 'exact':
+                print(f"Note: faiss is not installed, using exact NumPy search instead of {self.kind}")
+            candidates = self.embeddings if rows is None else self.embeddings[rows]
+            scores = candidates @ query[0]
+            top = top_k_indices(scores, k)
+            ids = top if rows is None else rows[top]
+            return [(float(scores[j]), self.sections[i]) for j, i in zip(top, ids)]
+
+        if self._faiss_index is None:
+            self._faiss_index = self._build_faiss_index()
+        index = self._faiss_index
+        params = None
+        if rows is not None:
+            selector = faiss.IDSelectorBatch(rows)
+            if isinstance(index, faiss.IndexIVF):
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+            elif isinstance(index, faiss.IndexHNSW):
+                params = faiss.SearchParametersHNSW(sel=selector)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+        elif isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.nprobe
+        scores, ids = index.search(query, k, params=params)
+        return [(float(score), self.sections[i]) for score, i in zip(scores[0], ids[0]) if i >= 0]
+
+    def save(self, index_dir):
+        """Write the index to a directory (embeddings.npy, sections.json and index.faiss when built)
+
+        Every file is written under a temporary name and renamed into place, so a loaded index
+        whose embeddings are memory-mapped from the old file keeps working.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        embeddings_path = os.path.join(index_dir, 'embeddings.npy')
+        with open(embeddings_path + '.tmp', 'wb') as f:
+            np.save(f, self.embeddings)
+        os.replace(embeddings_path + '.tmp', embeddings_path)
+
+        faiss_path = os.path.join(index_dir, 'index.faiss')
+        if faiss is not None and len(self):
+            if self._faiss_index is None:
+                self._faiss_index = self._build_faiss_index()
+            faiss.write_index(self._faiss_index, faiss_path + '.tmp')
+            os.replace(faiss_path + '.tmp', faiss_path)
+        elif os.path.exists(faiss_path):
+            os.remove(faiss_path)
+
+        # sections.json goes last: its presence marks a complete index
+        sections_path = os.path.join(index_dir, 'sections.json')
+        with open(sections_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"dim": self.dim, "model_id": self.model_id, "kind": self.kind, "nprobe": self.nprobe,
+                       "ivf_threshold": self.ivf_threshold, "documents": self.documents,
+                       "sections": [section.to_dict() for section in self.sections]}, f, ensure_ascii=False)
+        os.replace(sections_path + '.tmp', sections_path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, index_dir, kind=None):
+        """Load an index written by save(); the embeddings are memory-mapped. A different kind
+        than the stored one makes the faiss index be rebuilt on first search"""
+        with open(os.path.join(index_dir, 'sections.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(data["dim"], kind or data["kind"], data["ivf_threshold"], data["nprobe"], data.get("model_id"))
+        index.documents = data["documents"]
+        index.sections = [Section.from_dict(section) for section in data["sections"]]
+        index.embeddings = np.load(os.path.join(index_dir, 'embeddings.npy'), mmap_mode='r')
+        faiss_path = os.path.join(index_dir, 'index.faiss')
+        if faiss is not None and index.kind == data["kind"] and os.path.exists(faiss_path):
+            index._faiss_index = faiss.read_index(faiss_path)
+        return index
+
+    @classmethod
+    def exists(cls, index_dir):
+        return os.path.exists(os.path.join(index_dir, 'sections.json'))
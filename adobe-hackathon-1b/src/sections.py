@@ -0,0 +1,89 @@
+import re
+
+class Section:
+    """A section of a parsed document: its title, 1-indexed page and text
+
+    The text is a slice of a buffer shared by all sections of the document, so a document's text
+    is held (and sent back from a worker process) once, and sections cost a few slots each.
+    """
+    __slots__ = ('title', 'page', 'buffer', 'start', 'end', 'document')
+
+    def __init__(self, title, page, buffer, start=0, end=None, document=None):
+        self.title = title
+        self.page = page
+        self.buffer = buffer
+        self.start = start
+        self.end = len(buffer) if end is None else end
+        self.document = document
+
+    @property
+    def text(self):
+        return self.buffer[self.start:self.end]
+
+    def text_prefix(self, length):
+        """The first length characters of the text, without copying the rest"""
+        return self.buffer[self.start:min(self.end, self.start + length)]
+
+    def __len__(self):
+        return self.end - self.start
+
+    def to_dict(self):
+        return {"document": self.document, "page": self.page, "title": self.title, "text": self.text}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["title"], data["page"], data["text"], document=data.get("document"))
+
+    def __repr__(self):
+        return f"Section({self.title!r}, page={self.page}, {len(self)} chars)"
+
+def pack_sections(entries):
+    """Section records for (title, page, text) entries, sharing one text buffer"""
+    parts = []
+    bounds = []
+    length = 0
+    for title, page, text in entries:
+        parts.append(text)
+        bounds.append((title, page, length, length + len(text)))
+        length += len(text)
+    buffer = "".join(parts)
+    return [Section(title, page, buffer, start, end) for title, page, start, end in bounds]
+
+# Sentence ends, and bullet characters that start a new item in extracted text
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\s*[\u2022\u25aa\u25cf]\s*')
+
+def split_sentences(text, max_words=60):
+    """Sentences of text with whitespace collapsed; runs without punctuation are cut every max_words words"""
+    sentences = []
+    for sentence in SENTENCE_BREAK.split(text):
+        words = sentence.split()
+        for i in range(0, len(words), max_words):
+            sentences.append(" ".join(words[i:i + max_words]))
+    return sentences
+
+def sentence_windows(text, window=3, stride=2, max_words=120, min_words=11):
+    """Overlapping chunks of up to window consecutive sentences, starting every stride sentences
+
+    Chunks hold at most max_words words (at least one sentence), so they fit the encoder's sequence
+    length; chunks of fewer than min_words words and repeated chunks are dropped.
+    """
+    sentences = split_sentences(text, max_words)
+    lengths = [len(sentence.split()) for sentence in sentences]
+    chunks = []
+    seen = set()
+    start = 0
+    while start < len(sentences):
+        end = start + 1
+        words = lengths[start]
+        while end < min(len(sentences), start + window) and words + lengths[end] <= max_words:
+            words += lengths[end]
+            end += 1
+        chunk = " ".join(sentences[start:end])
+        if words >= min_words and chunk not in seen:
+            seen.add(chunk)
+            chunks.append(chunk)
+        if end >= len(sentences):
+            break
+        # A window cut short by max_words must not skip sentences
+        start += min(stride, end - start)
+    return chunks
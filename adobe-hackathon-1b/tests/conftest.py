@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules in src are imported by their plain names, as src/main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,88 @@
+"""
+Tests for the persistent embedding store, with a tiny dimension and capacity.
+
+Usage (from the adobe-hackathon-1b directory):
+    python -m pytest -q tests/test_embedding_store.py
+"""
+import itertools
+import numpy as np
+import pytest
+
+import embedding_store
+from embedding_store import EmbeddingStore
+
+DIM = 4
+
+def vector(value):
+    return np.full(DIM, value, dtype=np.float32)
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time, so access order never depends on clock resolution"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(embedding_store.time, 'time', lambda: float(next(ticks)))
+
+def test_round_trip_and_miss(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 'test-model', DIM, max_entries=4)
+    store.put_many(['alpha', 'beta'], [vector(1), vector(2)])
+    alpha, beta, gamma = store.get_many(['alpha', 'beta', 'gamma'])
+    assert np.array_equal(alpha, vector(1))
+    assert np.array_equal(beta, vector(2))
+    assert gamma is None
+    stats = store.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 2, 1)
+    store.close()
+
+def test_least_recently_used_entry_is_overwritten(tmp_path, clock):
+    store = EmbeddingStore(str(tmp_path), 'test-model', DIM, max_entries=2)
+    store.put_many(['alpha'], [vector(1)])
+    store.put_many(['beta'], [vector(2)])
+    # Reading alpha makes beta the least recently used entry
+    store.get_many(['alpha'])
+    store.put_many(['gamma'], [vector(3)])
+
+    alpha, beta, gamma = store.get_many(['alpha', 'beta', 'gamma'])
+    assert np.array_equal(alpha, vector(1))
+    assert beta is None
+    assert np.array_equal(gamma, vector(3))
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["entries"] == 2
+    store.close()
+
+def test_reopened_store_keeps_its_capacity(tmp_path, capsys):
+    store = EmbeddingStore(str(tmp_path), 'test-model', DIM, max_entries=2)
+    store.put_many(['alpha'], [vector(1)])
+    store.close()
+
+    reopened = EmbeddingStore(str(tmp_path), 'test-model', DIM, max_entries=8)
+    assert np.array_equal(reopened.get_many(['alpha'])[0], vector(1))
+    assert reopened.max_entries == 2
+    assert reopened.stats()["capacity"] == 2
+    assert "keeping it instead of the requested 8" in capsys.readouterr().out
+    reopened.close()
+
+def test_store_of_another_dimension_is_refused(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 'test-model', DIM, max_entries=2)
+    store.put_many(['alpha'], [vector(1)])
+    store.close()
+
+    with pytest.raises(ValueError, match="4-dimensional"):
+        EmbeddingStore(str(tmp_path), 'test-model', DIM * 2, max_entries=2).get_many(['alpha'])
+
+def test_reader_never_sees_a_slot_being_overwritten(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 'test-model', DIM, max_entries=2)
+    store.put_many(['alpha'], [vector(1)])
+    key = store.make_key('alpha')
+    records = store._records
+    assert np.array_equal(store._read_slot(0, key), vector(1))
+
+    # A writer in another process has started on the slot: odd version
+    records['version'][0] += 1
+    assert store._read_slot(0, key) is None
+    records['version'][0] += 1
+
+    # The slot now holds another text's vector
+    store._write_slot(0, store.make_key('beta'), vector(2))
+    assert store._read_slot(0, key) is None
+    assert store.get_many(['alpha']) == [None]
+    store.close()
@@ -0,0 +1,101 @@
+"""
+Tests for the persistent section index, using the NumPy search (faiss disabled).
+
+Usage (from the adobe-hackathon-1b directory):
+    python -m pytest -q tests/test_section_index.py
+"""
+import os
+import numpy as np
+import pytest
+
+import section_index
+from section_index import SectionIndex, top_k_indices
+from sections import pack_sections
+
+@pytest.fixture(autouse=True)
+def numpy_search(monkeypatch):
+    monkeypatch.setattr(section_index, 'faiss', None)
+
+def write_file(path, content, mtime_ns=None):
+    with open(path, 'wb') as f:
+        f.write(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+def build_index(tmp_path):
+    """Index of two documents: a.pdf with sections along x and y, b.pdf with one along z"""
+    index = SectionIndex(3, model_id='test-model')
+    a = write_file(tmp_path / 'a.pdf', b'document a', 1_000_000_000)
+    b = write_file(tmp_path / 'b.pdf', b'document b', 1_000_000_000)
+    index.add_document('a.pdf', SectionIndex.fingerprint(a),
+                       pack_sections([("X", 1, "about x"), ("Y", 2, "about y")]),
+                       [[2.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    index.add_document('b.pdf', SectionIndex.fingerprint(b),
+                       pack_sections([("Z", 1, "about z")]), [[0.0, 0.0, 3.0]])
+    return index, a, b
+
+def test_top_k_indices_orders_by_score_and_keeps_ties_in_order():
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5], dtype=np.float32)
+    assert top_k_indices(scores, 3).tolist() == [1, 4, 0]
+    assert top_k_indices(scores, 5).tolist() == [1, 4, 0, 2, 5]
+    assert top_k_indices(scores, 10).tolist() == [1, 4, 0, 2, 5, 3]
+
+def test_search_returns_cosine_scores(tmp_path):
+    index, _, _ = build_index(tmp_path)
+    results = index.search([1.0, 0.5, 0.0], 2)
+    assert [section.title for _, section in results] == ["X", "Y"]
+    assert results[0][0] == pytest.approx(1 / np.sqrt(1.25))
+    assert results[0][1].document == 'a.pdf'
+
+def test_search_restricted_to_documents(tmp_path):
+    index, _, _ = build_index(tmp_path)
+    results = index.search([0.0, 0.0, 1.0], 3, documents=['a.pdf'])
+    assert [section.title for _, section in results] == ["X", "Y"]
+    assert [section.title for _, section in index.search([0.0, 0.0, 1.0], 3, documents=['b.pdf'])] == ["Z"]
+    assert index.search([0.0, 0.0, 1.0], 3, documents=['missing.pdf']) == []
+
+def test_save_and_load(tmp_path):
+    index, _, _ = build_index(tmp_path)
+    index_dir = str(tmp_path / 'index')
+    assert not SectionIndex.exists(index_dir)
+    index.save(index_dir)
+    assert SectionIndex.exists(index_dir)
+
+    loaded = SectionIndex.load(index_dir)
+    assert (loaded.dim, loaded.model_id, len(loaded)) == (3, 'test-model', 3)
+    assert loaded.documents == index.documents
+    assert [section.text for section in loaded.sections] == ["about x", "about y", "about z"]
+    assert np.allclose(loaded.embeddings, index.embeddings)
+    assert [section.title for _, section in loaded.search([0.0, 1.0, 0.0], 1)] == ["Y"]
+
+def test_unchanged_and_new_documents(tmp_path):
+    index, a, b = build_index(tmp_path)
+    c = write_file(tmp_path / 'c.pdf', b'document c')
+    assert index.stale_documents([('a.pdf', a), ('b.pdf', b), ('c.pdf', c)]) == ['c.pdf']
+    assert not index.dirty
+
+def test_size_change_makes_a_document_stale(tmp_path):
+    index, a, _ = build_index(tmp_path)
+    write_file(a, b'document a, longer now', 1_000_000_000)
+    assert index.stale_documents([('a.pdf', a)]) == ['a.pdf']
+
+def test_touched_document_keeps_its_sections(tmp_path):
+    index, a, _ = build_index(tmp_path)
+    os.utime(a, ns=(2_000_000_000, 2_000_000_000))
+    assert index.stale_documents([('a.pdf', a)]) == []
+    assert index.documents['a.pdf']['mtime_ns'] == 2_000_000_000
+    assert index.dirty
+
+def test_content_change_of_the_same_size_makes_a_document_stale(tmp_path):
+    index, a, _ = build_index(tmp_path)
+    write_file(a, b'document A', 2_000_000_000)
+    assert index.stale_documents([('a.pdf', a)]) == ['a.pdf']
+    assert not index.dirty
+
+def test_replacing_a_document_drops_its_old_sections(tmp_path):
+    index, a, _ = build_index(tmp_path)
+    index.add_document('a.pdf', SectionIndex.fingerprint(a), pack_sections([("W", 1, "about w")]),
+                       [[1.0, 1.0, 0.0]])
+    assert sorted(section.title for section in index.sections) == ["W", "Z"]
+    assert index.embeddings.shape == (2, 3)
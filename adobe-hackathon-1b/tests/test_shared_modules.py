@@ -0,0 +1,19 @@
+"""
+Modules shared with Round 1A must stay identical to their 1A copies.
+
+Usage (from the adobe-hackathon-1b directory):
+    python -m pytest -q tests
+"""
+import os
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUND_1A_SRC = os.path.join(BASE_DIR, os.pardir, 'adobe-hackathon-1a', 'src')
+
+@pytest.mark.parametrize('module', ['instrumentation.py', 'output_writer.py'])
+def test_shared_module_matches_round_1a(module):
+    other = os.path.join(ROUND_1A_SRC, module)
+    if not os.path.exists(other):
+        pytest.skip("Round 1A checkout not available")
+    with open(os.path.join(BASE_DIR, 'src', module), 'rb') as f, open(other, 'rb') as g:
+        assert f.read() == g.read(), f"src/{module} differs from adobe-hackathon-1a/src/{module}"
@@ -0,0 +1,99 @@
+"""
+Tests for the sentence windows and the subsection analysis built on them.
+
+The processor is created without loading a model; embeddings come from a
+stub that marks chunks mentioning "beach" as relevant to the query.
+
+Usage (from the adobe-hackathon-1b directory):
+    python -m pytest -q tests/test_subsections.py
+"""
+import numpy as np
+
+from instrumentation import Instrumentation
+from pdf_processor import PDFProcessor, SECTION_EMBED_CHARS
+from sections import Section, split_sentences, sentence_windows
+
+QUERY = [1.0, 0.0]
+
+def sentence(topic, i, words=12):
+    """A sentence of the given number of words, distinct for every (topic, i)"""
+    return " ".join([topic, f"item{i}"] + ["word"] * (words - 2)) + "."
+
+def paragraph(topic, count, words=12):
+    return " ".join(sentence(topic, i, words) for i in range(count))
+
+def make_processor(max_chunks=30):
+    processor = PDFProcessor.__new__(PDFProcessor)
+    processor.instrumentation = Instrumentation()
+    processor.subsection_max_chunks = max_chunks
+    processor.embedded = []
+
+    def embed(texts):
+        processor.embedded.append(list(texts))
+        return np.array([[1.0, 0.2] if "beach" in text else [0.0, 1.0] for text in texts], dtype=np.float32)
+
+    processor._get_embeddings_batch = embed
+    return processor
+
+def ranked(text, score=0.5):
+    return {"section": Section("Title", 1, text), "score": score}
+
+def test_split_sentences_cuts_long_runs():
+    assert split_sentences("One two.  Three\nfour!") == ["One two.", "Three four!"]
+    assert [len(s.split()) for s in split_sentences(" ".join(["word"] * 25), max_words=10)] == [10, 10, 5]
+
+def test_sentence_windows_overlap_by_stride():
+    sentences = [sentence("topic", i) for i in range(5)]
+    assert sentence_windows(" ".join(sentences)) == [
+        " ".join(sentences[0:3]),
+        " ".join(sentences[2:5]),
+    ]
+
+def test_sentence_windows_respect_max_words_without_skipping_sentences():
+    sentences = [sentence("topic", i, words=50) for i in range(5)]
+    assert sentence_windows(" ".join(sentences)) == [
+        " ".join(sentences[0:2]),
+        " ".join(sentences[2:4]),
+        sentences[4],
+    ]
+
+def test_sentence_windows_drop_short_and_repeated_chunks():
+    assert sentence_windows("Too short. Also short.") == []
+    repeated = " ".join([sentence("topic", 0)] * 5)
+    assert sentence_windows(repeated) == [" ".join([sentence("topic", 0)] * 3)]
+
+def test_chunk_budget_is_shared_round_robin():
+    sections = [ranked(paragraph(topic, 9)) for topic in ("alpha", "beta", "gamma")]
+    chunks = [sentence_windows(section["section"].text) for section in sections]
+    assert [len(c) for c in chunks] == [4, 4, 4]
+
+    processor = make_processor(max_chunks=5)
+    processor.analyze_subsections(sections, QUERY)
+    assert processor.embedded == [[chunks[0][0], chunks[1][0], chunks[2][0], chunks[0][1], chunks[1][1]]]
+
+def test_single_chunk_section_reuses_its_ranking_score():
+    short = paragraph("beach", 2)
+    assert len(short) <= SECTION_EMBED_CHARS
+    processor = make_processor()
+    subsections = processor.analyze_subsections([ranked(short, score=0.77)], QUERY)
+    assert processor.embedded == []
+    assert subsections == [[{"refined_text": sentence_windows(short)[0], "relevance_score": 0.77}]]
+
+def test_long_single_chunk_section_is_embedded():
+    long_text = sentence("beach", 0, words=100)
+    assert len(long_text) > SECTION_EMBED_CHARS and len(sentence_windows(long_text)) == 1
+    processor = make_processor()
+    [subsection] = processor.analyze_subsections([ranked(long_text, score=0.77)], QUERY)
+    assert processor.embedded == [[long_text]]
+    assert subsection[0]["relevance_score"] == np.float32(1 / np.sqrt(1.04))
+
+def test_top_three_relevant_chunks_per_section():
+    text = " ".join([paragraph("beach", 7), paragraph("hotel", 8)])
+    chunks = sentence_windows(text)
+    processor = make_processor()
+    [subsection] = processor.analyze_subsections([ranked(text)], QUERY)
+    assert [item["refined_text"] for item in subsection] == [c for c in chunks if "beach" in c][:3]
+    assert all(item["relevance_score"] > 0.3 for item in subsection)
+
+    [irrelevant] = processor.analyze_subsections([ranked(paragraph("hotel", 9))], QUERY)
+    assert irrelevant == []